@@ -1,17 +1,16 @@
 #!/usr/bin/python3
 #-*- coding: utf-8 -*-
 import argparse
-import io
-import json
-import re
-import sys
-import datetime
 import os
+import sys
+import multiprocessing
 
-import jsonschema
-
-import modules
-from modules.analyzers import *
+import modules.bundle
+import modules.cache
+import modules.collector
+import modules.ndjson
+import modules.pipeline
+import modules.registry
 
 # Build argument parser
 parser = argparse.ArgumentParser(
@@ -20,92 +19,81 @@ parser = argparse.ArgumentParser(
 parser.add_argument('-c', '--compat', action='store_true', help='disables ISO8601 time format check')
 parser.add_argument('-d', '--dir', type=str, default='', help='specify directory where result files will be put')
 parser.add_argument('-f', '--file', type=str, nargs = '*', default=["data.txt"], help='set path of JSON-formatted LIS data files to read')
-parser.add_argument('-o', '--output', type=str, help='set path of output file (only when -r specified)')
+parser.add_argument('-i', '--incremental', action='store_true', help='analyze only timepoints added since the last run, resuming from checkpoints kept with the result files (for databases: only patients with results added since the last run)')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes analyzing files in parallel (0: one per CPU)')
+parser.add_argument('-o', '--output', type=str, help='set path of output file (with --output-format ndjson; default: stdout)')
 parser.add_argument('-r', '--human-readable', action='store_true', help='human-readable output')
 parser.add_argument('-s', '--suffix', type=str, default='_result.json', help='set suffix of output files (only when -r not specified)')
 parser.add_argument('-q', '--quiet', action='store_true', help='suppresses verbose messages')
 parser.add_argument('-w', '--warn', action='store_true', help='enable extra warnings')
+parser.add_argument('--atomic', action='store_true', help='write each result file to a temporary file first and rename it into place')
+parser.add_argument('--bundle-output', action='store_true', help='write the results of all patients of a bundle or export to one result file')
+parser.add_argument('--cache-size', type=int, default=64, help='maximum size of the result cache, in MB')
+parser.add_argument('--delta', action='store_true', help='write only the events that are new or resolved since the previous run (event IDs are kept next to the result files)')
+parser.add_argument('--episodes', action='store_true', help='collapse events repeated at consecutive timepoints of an item into one episode (start, end, count and most extreme value)')
+parser.add_argument('--event-store', type=str, help='also add events to this event store (SQLite database), for lisquery.py and lispublish.py')
+parser.add_argument('--full-validation', action='store_true', help='check data files against the JSON schema with jsonschema (slower)')
+parser.add_argument('--input-cache', action='store_true', help='save parsed copies of data files in __lispycache__ next to them, and read those instead while the data files are unchanged (only use on directories no one else can write to: copies are unpickled)')
+parser.add_argument('--input-format', choices=['json', 'bundle', 'ndjson', 'store', 'sqlite'], default='json', help='format of data files: one JSON file per patient, bundles of patients keyed by patient ID, long-format NDJSON exports with one result per line, columnar stores built with lisstore.py, or SQLite databases built with lisdb.py')
+parser.add_argument('--no-cache', action='store_true', help='analyze all files, even if unchanged since they were last analyzed')
 parser.add_argument('--no-correct', action='store_true', help='disable corrections for biochemical data')
 parser.add_argument('--no-convert', action='store_false', dest='convert', help='disable unit conversion (conversion enabled by default)')
+parser.add_argument('--output-format', choices=['json', 'ndjson'], default='json', help='write results to one JSON file per patient (or bundle), or to a single NDJSON stream with one line per patient (see -o)')
+parser.add_argument('--sorted', action='store_true', help='NDJSON exports are sorted by patient (read in a single pass)')
+parser.add_argument('--stream', action='store_true', help='read and analyze files a few timepoints at a time instead of loading them whole (for very long histories)')
+parser.add_argument('--validate-only', action='store_true', help='only check that data files are valid, printing those that are not and a summary (exits with status 1 if any is invalid)')
 parser.add_argument('--version', action='version', version='%(prog)s 0.1 "Blizzard"')
-args = parser.parse_args()
-
-def merge(*results):
-        result_dict = {}
-        for item in results:
-                for file_name in item.keys():
-                        for event_time in item[file_name].keys():
-                                if file_name not in result_dict.keys():
-                                        result_dict[file_name] = {}
-                                if event_time not in result_dict[file_name].keys():
-                                        result_dict[file_name][event_time] = []
-                                result_dict[file_name][event_time].extend(item[file_name][event_time])
-        return result_dict
-
-# Load data files from list
-for file_name in args.file:
-        lis_file = io.open(file_name)
-        try:
-                lis_struct = json.load(lis_file)
-        except ValueError:
-                raise Exception("Invalid JSON file")
-
-        # Basic checks:
-        # 0. Check against schema
-        # 1. Time format should be ISO8061 unless overridden by '--compat'
-        # 2. Level 1 values should be dicts
-        schema = {
-                "$schema": "http://json-schema.org/schema#",
-                "name": "Lab",
-                "type": "object",
-                "definitions": {
-                        "entry": {
-                                "lab_item": {"type": "string"},
-                                "lab_value": {"type": "string"},
-                                "unit": {"type": "string"},
-                                "date": {"type": "string"},
-                                "required": [
-                                        "lab_item",
-                                        "lab_value",
-                                        "unit",
-                                        "date"
-                                ]
-                        },
-                        "patient_id": {"type": "string"}
-                },
-                "properties": {}
-        }
-        jsonschema.validate(lis_struct, schema)
-        
-        time_re = re.compile("[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}")
 
-        for x in lis_struct.keys():
-                if not args.compat and time_re.match(x) == None:
-                        raise Exception("Top level keys not ISO8601 formatted")
-                if not isinstance(lis_struct[x], dict):
-                        raise Exception("Level 1 values not dicts")
+if __name__ == '__main__':
+        # Needed for --jobs in frozen (py2exe) executables
+        multiprocessing.freeze_support()
+        args = parser.parse_args()
 
-        ## Analysis section ##
-        for time in sorted(lis_struct.keys()):
-                # calls analyze() for each loaded lisanalyze module
-                for f in [i for i in sys.modules.keys() if re.match('.*lisanalyze', str(i))]:
-                        getattr(eval(f), 'analyze')(file_name, lis_struct, time, args)
-        # Merge results; total_results now contains the results of every analyzed file
-        j = []
-        for f in [i for i in sys.modules.keys() if re.match('.*lisanalyze', str(i))]:
-                j.append(getattr(eval(f), 'get_results')())
-        total_results = merge(*j)
+        if args.validate_only:
+                if args.input_format != 'json':
+                        parser.error("--validate-only applies to --input-format json")
+                invalid = 0
+                for file_name, error in modules.pipeline.check(args.file, args, args.jobs):
+                        if error is not None:
+                                invalid += 1
+                                print("{}: {}".format(file_name, error))
+                if not args.quiet:
+                        print("{} files checked, {} valid, {} invalid".format(len(args.file), len(args.file) - invalid, invalid))
+                sys.exit(1 if invalid else 0)
 
-for file_name in total_results.keys():
-        outfile = open(os.path.join(os.path.normpath(args.dir), file_name) + args.suffix, mode='w')
+        # Load analyzer modules once
+        analyzers = modules.registry.build()
 
-        # Add file_name and analysis_time params before we print
-        total_results[file_name]["file_name"] = file_name
-        total_results[file_name]["analysis_time"] = datetime.datetime.now().isoformat()
-        
-        print(json.dumps(total_results[file_name]))
-        print(json.dumps(total_results[file_name]), file=outfile)
-        outfile.close()
+        collector = modules.collector.ResultCollector(args)
+        if args.input_format in ('bundle', 'ndjson', 'store', 'sqlite'):
+                # Bundles, long-format exports, stores and databases: patients
+                # are read one at a time and analyzed as independent units,
+                # with results written per patient ID (or per bundle)
+                for file_name in args.file:
+                        if args.input_format == 'sqlite':
+                                analyzed = modules.pipeline.run_database(file_name, args, analyzers, args.jobs)
+                        elif args.input_format == 'store':
+                                analyzed = modules.pipeline.run_store(file_name, args, analyzers, args.jobs)
+                        elif args.input_format == 'bundle':
+                                analyzed = modules.pipeline.run_patients(modules.bundle.patients(file_name), args, analyzers, args.jobs)
+                        else:
+                                analyzed = modules.pipeline.run_patients(modules.ndjson.patients(file_name, args.sorted), args, analyzers, args.jobs)
+                        if args.bundle_output:
+                                collector.begin_bundle(file_name)
+                        for patient_id, results in analyzed:
+                                collector.add(patient_id, results)
+                        if args.bundle_output:
+                                collector.end_bundle()
+        else:
+                # Results of unchanged files are taken from the cache, kept
+                # with the result files
+                cache = None
+                if not args.no_cache:
+                        cache = modules.cache.ResultCache(os.path.join(os.path.normpath(args.dir), '.lisanalyze_cache'), args.cache_size * 1024 * 1024, modules.cache.fingerprint(args, analyzers))
 
-        if args.human_readable and not args.quiet and not eventstr:
-                print("All is well for data file {}!".format(file_name))
+                # Analyze data files from list; results come back in input
+                # order, and each file's events are written out and dropped as
+                # soon as it is done
+                for file_name, results in modules.pipeline.run(args.file, args, analyzers, args.jobs, cache):
+                        collector.add(file_name, results)
+        collector.close()
@@ -70,10 +70,14 @@ class Application(tk.Frame):
 			command=self.runAnalyzer, text="Run")
 		self.runButton.grid(row=0, column=2)
 		
+		self.eventsButton = tk.Button(self.buttonFrame,
+			command=self.queryEvents, text="Recent events")
+		self.eventsButton.grid(row=0, column=3)
+		
 		self.quitButton = tk.Button(self.buttonFrame,
 			command=self.quit, text="Quit"
 		)
-		self.quitButton.grid(row=0, column=3)
+		self.quitButton.grid(row=0, column=4)
 		
 		# List of files
 		self.fileList = tk.Listbox(self.lFrame,
@@ -139,7 +143,28 @@ class Application(tk.Frame):
 		self.resultsText.set(
 			str(
 				subprocess.check_output(
-					["python3", lisanalyzePath, "-f", filenames],
+					["python3", lisanalyzePath, "-r", "-f", filenames],
+					universal_newlines=True
+				)
+			)
+		)
+		return True
+	def queryEvents(self):
+		"""
+		Shows the events of the last 24 hours from an event store
+		(written by lisanalyze.py --event-store), by calling
+		lisquery.py. Might block due to the subprocess call.
+		"""
+		eventStore = tkFileDialog.askopenfilename(title="Event store")
+		if not eventStore:
+			return False
+
+		lisqueryPath = "./lisquery.py"
+		self.messageText.set("Current path to lisquery.py: " + lisqueryPath)
+		self.resultsText.set(
+			str(
+				subprocess.check_output(
+					["python3", lisqueryPath, "-e", eventStore, "-r", "--hours", "24"],
 					universal_newlines=True
 				)
 			)
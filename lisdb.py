@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+import argparse
+
+import modules.bundle
+import modules.database
+import modules.loader
+import modules.ndjson
+import modules.registry
+
+# Adds LIS data to a SQLite database (modules.database), for
+# lisanalyze.py --input-format sqlite. Data files are added with the file
+# name as patient ID; bundles and long-format exports with their own patient
+# IDs. Results already in the database are replaced if they have changed, so
+# the same or a newer export can be added again at any time; only the
+# patients whose results were added or changed are analyzed again by
+# lisanalyze.py --incremental.
+
+parser = argparse.ArgumentParser(
+        description='Loader of LIS data into a SQLite database',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('-c', '--compat', action='store_true', help='disables ISO8601 time format check')
+parser.add_argument('-f', '--file', type=str, nargs = '*', default=["data.txt"], help='set path of LIS data files to read')
+parser.add_argument('-o', '--output', type=str, default="lisanalyze.db", help='set path of SQLite database to add the data to')
+parser.add_argument('-q', '--quiet', action='store_true', help='suppresses verbose messages')
+parser.add_argument('--full-validation', action='store_true', help='check data files against the JSON schema with jsonschema (slower)')
+parser.add_argument('--input-cache', action='store_true', help='save parsed copies of data files in __lispycache__ next to them, and read those instead while the data files are unchanged (only use on directories no one else can write to: copies are unpickled)')
+parser.add_argument('--input-format', choices=['json', 'bundle', 'ndjson'], default='json', help='format of data files: one JSON file per patient, bundles of patients keyed by patient ID, or long-format NDJSON exports with one result per line')
+parser.add_argument('--sorted', action='store_true', help='NDJSON exports are sorted by patient (read in a single pass)')
+parser.add_argument('--version', action='version', version='%(prog)s 0.1')
+args = parser.parse_args()
+
+analyzers = modules.registry.build()
+
+def patients():
+        for file_name in args.file:
+                if args.input_format == 'json':
+                        yield file_name, modules.loader.load(file_name, args, analyzers)
+                        continue
+                if args.input_format == 'bundle':
+                        decoded = modules.bundle.patients(file_name)
+                else:
+                        decoded = modules.ndjson.patients(file_name, args.sorted)
+                for patient_id, lis_struct in decoded:
+                        modules.loader.prepare(lis_struct, args, analyzers)
+                        yield patient_id, lis_struct
+
+db = modules.database.connect(args.output, analyzers)
+count, changed = modules.database.ingest(db, patients())
+db.close()
+if not args.quiet:
+        print("{} patients read, {} results added or changed".format(count, changed))
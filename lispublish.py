@@ -5,6 +5,7 @@ import datetime
 import PyRSS2Gen
 import json
 import io
+import itertools
 
 # Generates RSS2 feeds for results of LIS data interpretation.
 # Requires PyRSS2Gen (installation on Windows: pip install PyRSS2Gen).
@@ -13,20 +14,45 @@ import io
 #    - What should the link URL and GUID for each post be?
 #    - What attributes of RSS2 should we use?
 
+# Severities of structured events (see modules/events.py), in increasing order
+__severities = ['notice', 'abnormal', 'panic']
+
+def event_text(event):
+    """
+    Returns the text of an event, as written by lisanalyze.py: either text
+    already (-r), or a structured record whose text is rendered here.
+    """
+    if isinstance(event, dict):
+        text = event["text"]
+        # Changes of events recorded as text (lisanalyze.py --delta) hold text only
+        if "code" in event:
+            text = text.format(value=event.get("value"), limit=event.get("limit"), unit=event.get("unit"), **event.get("detail", {}))
+        # Episodes (lisanalyze.py --episodes)
+        if event.get("count", 1) > 1:
+            text += " ({} times from {} to {})".format(event["count"], event["start"], event["end"])
+        # Changes (lisanalyze.py --delta)
+        if event.get("status") == "resolved":
+            text = "Resolved: " + text
+        return text
+    return event
+
 parser = argparse.ArgumentParser(
         description='RSS2 feed generator for LIS data',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 parser.add_argument('-f', '--file', type=str, nargs = '*', default=["data.txt_result.json"], help='set paths of JSON-formatted LIS event files to read')
+parser.add_argument('-e', '--event-store', type=str, help='read events from this event store (written by lisanalyze.py --event-store) instead of result files, writing one feed per patient (<patient ID><suffix>)')
 parser.add_argument('-s', '--suffix', type=str, default=".xml", help='set suffix of output files')
+parser.add_argument('--since', type=str, help='with --event-store, only events at or after this time (ISO8601)')
+parser.add_argument('--severity', choices=__severities, default='notice', help='leave out events less severe than this (events written as text are always kept)')
 #parser.add_argument('-q', '--quiet', action='store_true', help='suppresses verbose messages')
 #parser.add_argument('-w', '--warn', action='store_true', help='enable extra warnings')
 parser.add_argument('--version', action='version', version='%(prog)s 0.1 "Auspicious clouds"')
 args = parser.parse_args()
 
-for result_file_name in args.file:
-    result_file_fo = io.open(result_file_name)
-    result_struct = json.load(result_file_fo)
-
+def publish(result_struct, result_file_name, feed_file_name):
+    """
+    Writes the RSS2 feed of the results of one patient.
+    """
     rss_items = []
     t = 0
     for key in result_struct.keys():
@@ -35,13 +61,20 @@ for result_file_name in args.file:
         if key == "analysis_time":
             t = result_struct[key]
             continue
-        for event_name in result_struct[key]:
+        for event in result_struct[key]:
+            if isinstance(event, dict) and "severity" in event and __severities.index(event["severity"]) < __severities.index(args.severity):
+                continue
+            event_name = event_text(event)
+            # Changes have a stable ID, so feed readers see each change once
+            guid = result_struct["file_name"] + "_" + key + "_" + event_name
+            if isinstance(event, dict) and "id" in event:
+                guid = event["id"] + "_" + event["status"]
             rss_items.append(
                 PyRSS2Gen.RSSItem(
                     title = event_name,
                     link = "http://www.hosp.ncku.edu.tw", # placeholder URL
                     description = result_file_name + ": " + event_name + " detected at " + key + " (analysis performed at " + t + ")",
-                    guid = PyRSS2Gen.Guid(result_struct["file_name"] + "_" + key + "_" + event_name, isPermaLink=False),
+                    guid = PyRSS2Gen.Guid(guid, isPermaLink=False),
                     pubDate = datetime.datetime.strptime(key, "%Y-%m-%dT%H:%M") - datetime.timedelta(hours=8) # Assuming UTC+8; PyRSS2Gen requires UTC
                 )
             )
@@ -54,4 +87,22 @@ for result_file_name in args.file:
         lastBuildDate = datetime.datetime.now() - datetime.timedelta(hours=8),
         items = rss_items
     )
-    rss.write_xml(open(result_file_name + args.suffix, "w"))
+    rss.write_xml(open(feed_file_name, "w"))
+
+if args.event_store is not None:
+    # Only imported here, so that lispublish.py runs on its own otherwise
+    import modules.eventstore
+    db = modules.eventstore.connect(args.event_store)
+    rows = modules.eventstore.query(db, since=args.since)
+    for patient_id, patient_rows in itertools.groupby(rows, lambda row: row[0]):
+        result_struct = {"file_name": patient_id, "analysis_time": ""}
+        for _, time, record, added in patient_rows:
+            result_struct.setdefault(time, []).append(record)
+            result_struct["analysis_time"] = max(result_struct["analysis_time"], added)
+        publish(result_struct, patient_id, patient_id + args.suffix)
+    db.close()
+else:
+    for result_file_name in args.file:
+        result_file_fo = io.open(result_file_name)
+        result_struct = json.load(result_file_fo)
+        publish(result_struct, result_file_name, result_file_name + args.suffix)
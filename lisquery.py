@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+import argparse
+import json
+
+import modules.events
+import modules.eventstore
+
+# Queries an event store (modules.eventstore) written by
+# lisanalyze.py --event-store, e.g. all patients with severe hyperkalemia in
+# the last 24 hours:
+#
+#     lisquery.py -e events.db --code K.panic_high --hours 24
+#
+# Matching events are printed one per line, as JSON objects holding the
+# patient ID, the event time, the analysis time of the run that added it
+# (added) and the event's fields, or as text with -r.
+
+parser = argparse.ArgumentParser(
+        description='Query tool for event stores written by lisanalyze.py',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('-a', '--analyte', type=str, nargs = '*', help='only events of these analytes')
+parser.add_argument('-c', '--code', type=str, nargs = '*', help='only events of these codes (e.g. K.panic_high; K.* for all codes starting with K.)')
+parser.add_argument('-e', '--event-store', type=str, default="events.db", help='set path of event store to query')
+parser.add_argument('-l', '--limit', type=int, help='print at most this many events')
+parser.add_argument('-p', '--patient', type=str, nargs = '*', help='only events of these patient IDs (or file names)')
+parser.add_argument('-r', '--human-readable', action='store_true', help='human-readable output')
+parser.add_argument('-s', '--severity', choices=modules.events.SEVERITIES, help='only events at least this severe')
+parser.add_argument('--hours', type=float, help='only events of the last HOURS hours (overrides --since)')
+parser.add_argument('--since', type=str, help='only events at or after this time (ISO8601)')
+parser.add_argument('--until', type=str, help='only events at or before this time (ISO8601)')
+parser.add_argument('--version', action='version', version='%(prog)s 0.1')
+args = parser.parse_args()
+
+since = args.since
+if args.hours is not None:
+        since = modules.eventstore.hours_ago(args.hours)
+
+db = modules.eventstore.connect(args.event_store)
+for patient_id, time, record, added in modules.eventstore.query(db, args.patient, args.code, args.analyte, args.severity, since, args.until, args.limit):
+        if args.human_readable:
+                if isinstance(record, dict):
+                        record = str(modules.events.from_dict(record))
+                print("{} {}: {}".format(patient_id, time, record))
+        elif isinstance(record, dict):
+                print(json.dumps(dict(record, patient_id=patient_id, time=time, added=added)))
+        else:
+                print(json.dumps({"patient_id": patient_id, "time": time, "added": added, "text": record}))
+db.close()
@@ -0,0 +1,28 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+import argparse
+
+import modules.loader
+import modules.registry
+import modules.store
+
+# Builds a columnar store (modules.store) from JSON-formatted LIS data files,
+# one patient per file, with the file name as patient ID. The data is
+# validated and normalized once, here; lisanalyze.py --input-format store then
+# reads it in place. Rebuild the store after the data files change or after
+# adding an analyzer or item name.
+
+parser = argparse.ArgumentParser(
+        description='Builder of columnar stores of LIS data',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('-c', '--compat', action='store_true', help='disables ISO8601 time format check')
+parser.add_argument('-f', '--file', type=str, nargs = '*', default=["data.txt"], help='set path of JSON-formatted LIS data files to read')
+parser.add_argument('-o', '--output', type=str, default="data.store", help='set path of store file to write')
+parser.add_argument('--full-validation', action='store_true', help='check data files against the JSON schema with jsonschema (slower)')
+parser.add_argument('--input-cache', action='store_true', help='save parsed copies of data files in __lispycache__ next to them, and read those instead while the data files are unchanged (only use on directories no one else can write to: copies are unpickled)')
+parser.add_argument('--version', action='version', version='%(prog)s 0.1')
+args = parser.parse_args()
+
+analyzers = modules.registry.build()
+patients = ((file_name, modules.loader.load(file_name, args, analyzers)) for file_name in args.file)
+modules.store.write(args.output, patients, analyzers)
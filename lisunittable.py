@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+import argparse
+import io
+
+import pint
+
+# Regenerates modules/unit_table.py, the precompiled table of conversion
+# factors used by modules.units. With the table in place, lisanalyze.py does
+# not need to import pint at all unless it meets a unit that is not listed
+# here. Rerun this script after adding an analyzer or a new unit spelling.
+
+# (analyte, target unit, pint context, molecular weight in g/mol);
+# keep in sync with the unit, context and mw of the rule tables (RULES and
+# INPUTS) in modules/analyzers, and the target units of analyzers that call
+# units.get_factor() themselves (PSA)
+TARGETS = [
+    ("AFP", "ng/ml", None, None),
+    ("albumin", "g/dl", None, None),
+    ("ALT", "U/l", None, None),
+    ("AST", "U/l", None, None),
+    ("BUN", "mg/dl", 'chemistry', 60.06),
+    ("C-peptide", "ng/ml", 'chemistry', 3020.29),
+    ("Ca", "mg/dl", 'chemistry', 40.08),
+    ("CEA", "ng/ml", None, None),
+    ("Cr", "mg/dl", 'chemistry', 113.126),
+    ("glucose", "mg/dl", 'chemistry', 180.16),
+    ("K", "mmol/l", None, None),
+    ("Mg", "mg/dl", 'chemistry', 24.31),
+    ("Na", "mmol/l", None, None),
+    ("P", "mg/dl", 'chemistry', 30.97),
+    ("PRL", "ng/ml", None, None),
+    ("PSA", "ng/dl", None, None),
+]
+
+# Unit spellings as found in LIS data
+UNITS = [
+    "mmol/l", "mmol/L", "umol/l", "umol/L", "nmol/l", "nmol/L", "pmol/l", "pmol/L",
+    "mol/l",
+    "g/l", "g/L", "g/dl", "g/dL", "mg/l", "mg/L", "mg/dl", "mg/dL", "mg/ml",
+    "ug/l", "ug/L", "ug/dl", "ug/dL", "ug/ml", "ug/mL",
+    "ng/l", "ng/L", "ng/dl", "ng/dL", "ng/ml", "ng/mL", "pg/ml", "pg/mL",
+    "U/l", "U/L", "U/ml", "U/mL", "mU/ml", "mU/mL", "kat/l", "ukat/l", "ukat/L",
+]
+
+parser = argparse.ArgumentParser(
+        description='Generator for the precompiled unit conversion table',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('-o', '--output', type=str, default="modules/unit_table.py", help='set path of generated module')
+parser.add_argument('--version', action='version', version='%(prog)s 0.1')
+args = parser.parse_args()
+
+# Same definitions as modules.units.get_registry()
+ureg = pint.UnitRegistry()
+ureg.define('kat = 1 mol / s')
+ureg.define('U = 1.657e-8 kat')
+
+# Analytes sharing a target unit (e.g. K and Na) share table entries
+targets = {}
+for analyte, target, context, mw in TARGETS:
+    targets.setdefault((target, context, mw), []).append(analyte)
+
+lines = []
+for (target, context, mw), analytes in targets.items():
+    lines.append("    # {}".format(", ".join(analytes)))
+    for unit in UNITS:
+        try:
+            if context is None:
+                factor = (ureg.parse_expression(unit)).to(target).magnitude
+            else:
+                factor = (ureg.parse_expression(unit)).to(target, context, mw=mw*ureg('g/mol')).magnitude
+        except pint.errors.DimensionalityError:
+            continue
+        lines.append("    ({!r}, {!r}, {!r}, {!r}): {!r},".format(unit, target, context, mw, float(factor)))
+
+outfile = io.open(args.output, mode='w', newline='\r\n')
+print("#-*- coding: utf-8 -*-", file=outfile)
+print("", file=outfile)
+print("# Generated by lisunittable.py with pint {}; do not edit by hand.".format(pint.__version__), file=outfile)
+print("# Maps (unit, target unit, context, mw) to conversion factors; see modules.units.", file=outfile)
+print("", file=outfile)
+print("FACTORS = {", file=outfile)
+for line in lines:
+    print(line, file=outfile)
+print("}", file=outfile)
+outfile.close()
@@ -1,11 +1,13 @@
 # Module list for analyzers
 # Remember to edit this list if any modules are added or removed!
 __all__ = [
+	"lisanalyze_afp",
 	"lisanalyze_alt",
 	"lisanalyze_ast",
 	"lisanalyze_bun",
 	"lisanalyze_c_peptide",
 	"lisanalyze_ca_blood",
+	"lisanalyze_cea",
 	"lisanalyze_cr",
 	"lisanalyze_glucose",
 	"lisanalyze_k",
@@ -1,165 +1,130 @@
 #!/usr/bin/python3
 #-*- coding: utf-8 -*-
 
-import re
+import math
 import sys
 
+import modules.events as events
+import modules.series
+import modules.units as units
+
 # Notes on writing modules:
 # 1. Names of variables strictly local to the current module should
-# begin with 2 underscores; also, they need to be declared global (since state is maintained)
-# 2. __event_dict stores *all* PSA-related events for *all* files. Whether this
-# is desirable is up for debate.
+# begin with 2 underscores.
+# 2. State that must be maintained between timepoints of a patient lives in a
+# PSAState object kept in the patient's context, never in module globals, so
+# that it does not leak from one patient into the next.
 
 # Variables local to module
-__psa_current_nadir = float('infinity')
 __psa_ul = 400 # 4 ng/ml
 __psa_ll = 0
-__psa_increases = 0
-__psa_last_value = None
 __unit = "ng/dl"
-__event_dict = {}
+__alias = {"PSA": "PSA"}
+# Templates of event texts (see modules.events)
+__text_high_ref = "PSA too high (current value {value} ; reference value {limit} ({unit}))"
+__text_high = "PSA too high (current value {value}; reference value {limit} ({unit}))"
+__text_low = "PSA too low (current value {value}; reference value {limit} ({unit}))"
+__text_failure_nadir = "PSA biochemical failure (PSA increase by 2.0 ng/dl)"
+__text_failure_increases = "PSA biochemical failure (3 consecutive increases)"
+__text_failure_info = "(nadir = {limit}, value = {value} ({unit}))"
+
+class PSAState(object):
+    """
+    PSA history of one patient.
+    """
+    __slots__ = ("nadir", "last_value", "increases")
+
+    def __init__(self):
+        self.nadir = float('infinity')
+        self.last_value = None
+        self.increases = 0
 
-def analyze(file_name, lis_struct, time, args):
+def analyze_series(ctx, series, timeline, args):
     """
-    Analyzes LIS results, looking for PSA-related events, and puts events
-    into a dict {file_name -> {event_time -> (event_str)}}.
+    Analyzes the PSA history of a patient, looking for PSA-related events,
+    and records events in ctx.
 
-    :param file_name: (str) name of current JSON file being read
-    :param lis_struct: (dict) dict containing item and value pairs
-    :param time: (str) time when results were obtained (as contained in JSON file)
+    :param ctx: (PatientContext) context of the patient being analyzed
+    :param series: (Series) PSA values of the patient, in time order
+    :param timeline: (Timeline) all series of the patient
     :param args: (dict) switches provided to lisanalyze.py via argparse
 
     :returns:    False
     """
 
-    global __psa_current_nadir
-    global __psa_last_value
-    global __psa_increases
-
-    # Basic checks and value-setting
-    if "PSA" in lis_struct[time].keys():
-        if args.warn and lis_struct[time]["PSA"]["unit"] != __unit:
+    state = ctx.get_state(__name__, PSAState)
+    # Biochemical failures show the nadir and value, unless --quiet
+    failure_nadir = __text_failure_nadir
+    failure_increases = __text_failure_increases
+    if not args.quiet:
+        failure_nadir += __text_failure_info
+        failure_increases += __text_failure_info
+
+    for i, (time, entry, unit) in enumerate(zip(series.times, series.entries, series.units)):
+        # Basic checks and value-setting
+        if args.warn and unit != __unit:
             print("WARNING: unit mismatch in entry for {}".format(time), file=sys.stderr)
-        if re.match(">", lis_struct[time]["PSA"]["lab_value"]):
-            psa_val = float('infinity')
-        elif re.match("<", lis_struct[time]["PSA"]["lab_value"]):
-            psa_val = 0
-            __psa_current_nadir = 0
+        if series.flags[i] & modules.series.NON_NUMERIC:
+            if args.warn:
+                print("WARNING: non-numeric value in entry for {}".format(time), file=sys.stderr)
+            continue
+        qualifier = series.qualifiers[i]
+        if qualifier == modules.series.Qualifier.GREATER:
+            reported = float('infinity')
+        elif qualifier == modules.series.Qualifier.LESS:
+            reported = 0
+            state.nadir = 0
         else:
-            psa_val = float(lis_struct[time]["PSA"]["lab_value"])
-    else:
-        return None
+            reported = series.values[i]
+        psa_val = reported
 
-    # Unit conversion
-    if args.convert:
-        import pint
-        ureg = pint.UnitRegistry()
-        factor = (ureg.parse_expression(lis_struct[time]["PSA"]["unit"])).to(__unit).magnitude
-        psa_val *= factor
-
-    if psa_val < __psa_current_nadir:
-        __psa_current_nadir = psa_val
-
-    # Out-of-normal-range warning; provided values take precedence
-    if "ref_high" in lis_struct[time]["PSA"].keys():
-        if lis_struct[time]["PSA"]["lab_value"] > lis_struct[time]["PSA"]["ref_high"]:
-            event_time = time
-            if file_name not in __event_dict.keys():
-                __event_dict[file_name] = {}
-            if event_time not in __event_dict[file_name].keys():
-                __event_dict[file_name][event_time] = []
-            event_str = "PSA too high (current value {} ; reference value {} ({}))".format(lis_struct[time]["PSA"]["lab_value"], lis_struct[time]["PSA"]["ref_high"], lis_struct[time]["PSA"]["unit"])
-            __event_dict[file_name][event_time].append(event_str)
-    else:
-        if args.warn:
-            print("WARNING: higher reference value not provided; falling back to built-in value", file=sys.stderr)
-        if psa_val > __psa_ul:
-            event_time = time
-            if file_name not in __event_dict.keys():
-                __event_dict[file_name] = {}
-            if event_time not in __event_dict[file_name].keys():
-                __event_dict[file_name][event_time] = []
-            event_str = "PSA too high (current value {}; reference value {} ({}))".format(psa_val, __psa_ul, __unit)
-            __event_dict[file_name][event_time].append(event_str)
-    if "ref_low" in lis_struct[time]["PSA"].keys():
-        if lis_struct[time]["PSA"]["lab_value"] < lis_struct[time]["PSA"]["ref_low"]:
-            event_time = time
-            if file_name not in __event_dict.keys():
-                __event_dict[file_name] = {}
-            if event_time not in __event_dict[file_name].keys():
-                __event_dict[file_name][event_time] = []
-            event_str = "PSA too low (current value {}; reference value {} ({}))".format(lis_struct[time]["PSA"]["lab_value"], lis_struct[time]["PSA"]["ref_low"], lis_struct[time]["PSA"]["unit"])
-            __event_dict[file_name][event_time].append(event_str)
-    else:
-        if args.warn:
-            print("WARNING: lower reference value not provided; falling back to built-in value", file=sys.stderr)
-        if psa_val < __psa_ll:
-            event_time = time
-            if file_name not in __event_dict.keys():
-                __event_dict[file_name] = {}
-            if event_time not in __event_dict[file_name].keys():
-                __event_dict[file_name][event_time] = []
-            event_str = "PSA too low (current value {}; reference value {} ({}))".format(psa_val, __psa_ll, __unit)
-            __event_dict[file_name][event_time].append(event_str)
-
-    # PSA increase by 2.0 ng/dl (Prostate Cancer Foundation)
-    if psa_val - __psa_current_nadir > 2:
-        event_name = "PSA biochemical failure (PSA increase by 2.0 ng/dl)"
-        event_time = time
-
-        event_str = ""
-
-        if file_name not in __event_dict.keys():
-            __event_dict[file_name] = {}
-        if event_time not in __event_dict[file_name].keys():
-            __event_dict[file_name][event_time] = []
-
-        event_str = event_name
-
-        if not args.quiet:
-            event_str += "(nadir = {}, value = {} ({}))".format(__psa_current_nadir, psa_val, __unit)
-
-        __event_dict[file_name][event_time].append(event_str)
-
-    # 3 consecutive increases in PSA (Lange Pocket Guide to Diagnostic Tests, 6e, p.239)
-    if __psa_last_value is not None and psa_val > __psa_last_value:
-        __psa_increases += 1
-    else:
-        __psa_increases = 0
-    if __psa_increases >= 3:
-        event_name = "PSA biochemical failure (3 consecutive increases)"
-        event_time = time
-
-        event_str = ""
+        # Unit conversion
+        if args.convert:
+            factor = units.get_factor(unit, __unit)
+            psa_val *= factor
 
-        if file_name not in __event_dict.keys():
-            __event_dict[file_name] = {}
-        if event_time not in __event_dict[file_name].keys():
-            __event_dict[file_name][event_time] = []
+        if psa_val < state.nadir:
+            state.nadir = psa_val
 
-        event_str = event_name
-        if not args.quiet:
-            event_str += "(nadir = {}, value = {} ({}))".format(__psa_current_nadir, psa_val, __unit)
-
-        __event_dict[file_name][event_time].append(event_str)
+        # Out-of-normal-range warning; provided values take precedence
+        if not math.isnan(series.ref_high[i]):
+            if reported > series.ref_high[i]:
+                ctx.add_event(time, events.Event("PSA.high", "PSA", events.ABNORMAL, __text_high_ref, entry["lab_value"], entry["ref_high"], unit))
+        else:
+            if args.warn:
+                print("WARNING: higher reference value not provided; falling back to built-in value", file=sys.stderr)
+            if psa_val > __psa_ul:
+                ctx.add_event(time, events.Event("PSA.high", "PSA", events.ABNORMAL, __text_high, psa_val, __psa_ul, __unit))
+        if not math.isnan(series.ref_low[i]):
+            if reported < series.ref_low[i]:
+                ctx.add_event(time, events.Event("PSA.low", "PSA", events.ABNORMAL, __text_low, entry["lab_value"], entry["ref_low"], unit))
+        else:
+            if args.warn:
+                print("WARNING: lower reference value not provided; falling back to built-in value", file=sys.stderr)
+            if psa_val < __psa_ll:
+                ctx.add_event(time, events.Event("PSA.low", "PSA", events.ABNORMAL, __text_low, psa_val, __psa_ll, __unit))
+
+        # PSA increase by 2.0 ng/dl (Prostate Cancer Foundation)
+        if psa_val - state.nadir > 2:
+            ctx.add_event(time, events.Event("PSA.failure_nadir", "PSA", events.ABNORMAL, failure_nadir, psa_val, state.nadir, __unit))
+
+        # 3 consecutive increases in PSA (Lange Pocket Guide to Diagnostic Tests, 6e, p.239)
+        if state.last_value is not None and psa_val > state.last_value:
+            state.increases += 1
+        else:
+            state.increases = 0
+        if state.increases >= 3:
+            ctx.add_event(time, events.Event("PSA.failure_increases", "PSA", events.ABNORMAL, failure_increases, psa_val, state.nadir, __unit))
 
-    __psa_last_value = psa_val
+        state.last_value = psa_val
 
     return False
 
-def get_results():
-    """
-    Returns dict of PSA-related tests.
-    Parameters: none
-    Return value: dict {file_name -> {event_time -> (event_str)}}
-    """
-    return __event_dict
-
-def passthrough(file_name, lis_struct, time, args):
+def passthrough(ctx, lis_struct, time, args):
     """
     Passes tuple of (value, unit) of PSA at indicated time, in a standardized form.
 
-    :param file_name: (str) name of current JSON file being read
+    :param ctx: (PatientContext) context of the patient being analyzed
     :param lis_struct: (dict) dict containing item and value pairs
     :param time: (str) time when results were obtained (as contained in JSON file)
     :param args: (dict) switches provided to lisanalyze.py via argparse
@@ -171,14 +136,18 @@ def passthrough(file_name, lis_struct, time, args):
     if "PSA" in lis_struct[time].keys():
         if args.warn and lis_struct[time]["PSA"]["unit"] != __unit:
             print("WARNING: unit mismatch in entry for {}".format(time), file=sys.stderr)
-        psa_val = float(lis_struct[time]["PSA"]["lab_value"])
+        psa_val, qualifier, flags = modules.series.parse_value(lis_struct[time]["PSA"]["lab_value"])
+        if flags & modules.series.NON_NUMERIC:
+            return None
+        if qualifier == modules.series.Qualifier.GREATER:
+            psa_val = float('infinity')
+        elif qualifier == modules.series.Qualifier.LESS:
+            psa_val = 0
     else:
         return None
 
     # Unit conversion
     if args.convert:
-        import pint
-        ureg = pint.UnitRegistry()
-        factor = (ureg.parse_expression(lis_struct[time]["PSA"]["unit"])).to(__unit).magnitude
+        factor = units.get_factor(lis_struct[time]["PSA"]["unit"], __unit)
         psa_val *= factor
     return psa_val, __unit
@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Reader for multi-patient bundle files (--input-format bundle).
+#
+# A bundle holds the data of many patients in one JSON object keyed by
+# patient ID, each value having the form of a single-patient data file:
+#
+#     {"123": {"2016-01-01T08:00": {"K": {"lab_value": "6.5", "unit": "mmol/l"}}},
+#      "456": {...}}
+#
+# patients() reads a bundle one patient at a time (modules.stream), so each
+# patient becomes an independent unit of work, and a bundle of any size is
+# analyzed with memory bounded by its largest patient.
+
+import io
+
+import modules.stream
+
+def patients(file_name):
+    """
+    Reads a bundle file, yielding the data of each patient.
+
+    :param file_name: (str) path of bundle file to read
+
+    :returns: generator of tuples (patient_id, {time -> {item -> entry}})
+    """
+    with io.open(file_name) as bundle_file:
+        for patient_id, lis_struct in modules.stream.items(bundle_file):
+            if not isinstance(lis_struct, dict):
+                raise Exception("Data of patient {} not a dict".format(patient_id))
+            yield patient_id, lis_struct
@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Content-addressed cache of analysis results.
+#
+# The results of each analyzed file are stored under a SHA-256 digest of the
+# file's contents, of the analyzers (their names and source code, and that of
+# the modules they run on) and of the switches that change results. A file
+# whose contents, analyzers and switches are unchanged since it was last
+# analyzed is neither read into JSON nor validated nor analyzed again: its
+# stored events are written out as is, with a new analysis_time. Identical
+# files share one entry, whatever their names.
+#
+# Entries are JSON files in the cache directory (one per digest), written to a
+# temporary file first and then renamed. The cache is kept under a size limit
+# by evicting the least recently used entries; an entry's modification time
+# is its last use, so the order survives between runs.
+
+import collections
+import hashlib
+import json
+import os
+
+import modules.derived
+import modules.episodes
+import modules.events
+import modules.loader
+import modules.rules
+import modules.series
+import modules.unit_table
+import modules.units
+
+# Variables local to module
+__version = 2
+__core_modules = [modules.derived, modules.episodes, modules.events, modules.loader, modules.rules, modules.series, modules.unit_table, modules.units]
+
+def fingerprint(args, analyzers):
+    """
+    Returns what results depend on besides the input file: the analyzers and
+    the switches that change results.
+
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: bytes
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((__version, analyzers.names, args.compat, args.no_correct, args.convert, args.quiet, args.episodes)).encode())
+    for m in analyzers.modules + __core_modules:
+        digest.update(m.__name__.encode())
+        try:
+            with open(m.__file__, 'rb') as f:
+                digest.update(f.read())
+        except (OSError, AttributeError, TypeError):
+            # e.g. frozen executables; the module name (and version) must do
+            pass
+    return digest.digest()
+
+class ResultCache(object):
+    """
+    Results of analyzed files, keyed by content digest, with LRU eviction.
+    """
+    __slots__ = ("directory", "max_size", "base", "entries", "size")
+
+    def __init__(self, directory, max_size, base):
+        """
+        :param directory: (str) directory holding the cache entries
+        :param max_size: (int) maximum total size of the entries, in bytes
+        :param base: (bytes) fingerprint of analyzers and switches
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.base = base
+        os.makedirs(directory, exist_ok=True)
+        # digest -> size of entry, least recently used first
+        found = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        self.entries = collections.OrderedDict((key, size) for mtime, key, size in sorted(found))
+        self.size = sum(self.entries.values())
+        # The size limit may have been lowered since the last run
+        self.__evict()
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def __evict(self):
+        while self.size > self.max_size and self.entries:
+            old_key, old_size = self.entries.popitem(last=False)
+            self.size -= old_size
+            try:
+                os.remove(self.__path(old_key))
+            except OSError:
+                pass
+
+    def key(self, file_name):
+        """
+        Returns the cache key of an input file.
+
+        :param file_name: (str) path of JSON file
+
+        :returns: str
+        """
+        digest = hashlib.sha256(self.base)
+        with open(file_name, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """
+        Returns the results stored under a key, marking them as recently used.
+
+        :param key: (str) cache key, as returned by key()
+
+        :returns: dict {event_time -> [Event]}, or None if not cached
+        """
+        if key not in self.entries:
+            return None
+        path = self.__path(key)
+        try:
+            with open(path, 'r') as f:
+                results = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Removed or damaged behind our back (e.g. by another run)
+            self.size -= self.entries.pop(key)
+            return None
+        self.entries.move_to_end(key)
+        return modules.events.from_records(results)
+
+    def put(self, key, results):
+        """
+        Stores the results of a file, evicting least recently used entries
+        if the cache grows over its size limit.
+
+        :param key: (str) cache key, as returned by key()
+        :param results: (dict) {event_time -> [Event]}
+        """
+        path = self.__path(key)
+        temp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp_path, 'w') as f:
+            # Not written for other programs; keeps infinite values as they are
+            json.dump(modules.events.records(results, False), f)
+        os.replace(temp_path, path)
+        if key in self.entries:
+            self.size -= self.entries.pop(key)
+        self.entries[key] = os.path.getsize(path)
+        self.size += self.entries[key]
+        self.__evict()
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Per-patient checkpoints for incremental analysis (--incremental).
+#
+# After a file is analyzed, its checkpoint records the last timepoint
+# analyzed, the number of timepoints up to it and a digest of their contents
+# (a running hash over the timepoints in time order), the events found so far
+# and the analyzer state objects kept in the patient's context (e.g. PSA nadir
+# and consecutive increases). On the next run, only timepoints after the
+# checkpoint are analyzed, starting from the saved state, and the saved
+# events are kept, so the results are those of a full run. A checkpoint is
+# ignored (and the file analyzed in full) if it was written by another
+# version, with another set of analyzers or with other switches that affect
+# results, or if the timepoints it covers have changed, in number or content
+# (e.g. a value amended in the LIS after it was analyzed).
+#
+# Checkpoints are pickled next to the result files, and written to a
+# temporary file first so that an interrupted run never leaves a truncated
+# checkpoint behind.
+
+import hashlib
+import json
+import os
+import pickle
+
+# Variables local to module
+__version = 3
+__suffix = ".checkpoint"
+
+class Checkpoint(object):
+    """
+    Analysis state of one patient after a run.
+    """
+    __slots__ = ("version", "key", "last_time", "count", "digest", "events", "state")
+
+    def __init__(self, version, key, last_time, count, digest, events, state):
+        """
+        :param version: (int) version of the checkpoint format
+        :param key: (tuple) analyzers and switches the checkpoint is valid for
+        :param last_time: (str) last timepoint analyzed (as contained in JSON file)
+        :param count: (int) number of timepoints up to last_time
+        :param digest: (str) digest of the timepoints up to last_time
+        :param events: (dict) {event_time -> [Event]} found so far
+        :param state: (dict) analyzer name -> analyzer state object
+        """
+        self.version = version
+        self.key = key
+        self.last_time = last_time
+        self.count = count
+        self.digest = digest
+        self.events = events
+        self.state = state
+
+class Digest(object):
+    """
+    Running digest of the timepoints of a file, fed in time order.
+    """
+    __slots__ = ("hash",)
+
+    def __init__(self):
+        self.hash = hashlib.sha256()
+
+    def update(self, time, entries):
+        """
+        :param time: (str) time of the timepoint (as contained in JSON file)
+        :param entries: (dict) item -> entry, normalized (see modules.loader)
+        """
+        self.hash.update(json.dumps([time, entries], sort_keys=True).encode())
+
+    def hexdigest(self):
+        """
+        Returns the digest of the timepoints fed so far.
+
+        :returns: str
+        """
+        return self.hash.hexdigest()
+
+def path(file_name, args):
+    """
+    Returns the path of the checkpoint of an input file.
+    """
+    return os.path.join(os.path.normpath(args.dir), file_name) + __suffix
+
+def key(args, analyzers):
+    """
+    Returns what a checkpoint must have been written with to be reused: the
+    analyzers, and the switches that change results.
+
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: tuple
+    """
+    return (tuple(analyzers.names), args.compat, args.no_correct, args.convert, args.quiet, args.episodes)
+
+def load(file_name, args, analyzers):
+    """
+    Reads the checkpoint of an input file.
+
+    :param file_name: (str) path of JSON file
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: Checkpoint, or None if there is no usable checkpoint
+    """
+    try:
+        with open(path(file_name, args), 'rb') as f:
+            checkpoint = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(checkpoint, Checkpoint) or checkpoint.version != __version:
+        return None
+    if checkpoint.key != key(args, analyzers):
+        return None
+    return checkpoint
+
+def save(file_name, args, analyzers, ctx, last_time, count, digest):
+    """
+    Writes the checkpoint of an input file after it has been analyzed.
+
+    :param file_name: (str) path of JSON file
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+    :param ctx: (PatientContext) context of the patient, after analysis
+    :param last_time: (str) last timepoint in the file
+    :param count: (int) number of timepoints in the file
+    :param digest: (Digest) digest of all timepoints in the file
+    """
+    checkpoint = Checkpoint(__version, key(args, analyzers), last_time, count, digest.hexdigest(), ctx.events, ctx.state)
+    checkpoint_path = path(file_name, args)
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, checkpoint_path)
+
+def matches(checkpoint, count, digest):
+    """
+    Returns whether the timepoints up to a checkpoint are those it was
+    written for.
+
+    :param checkpoint: (Checkpoint) checkpoint of the file
+    :param count: (int) number of timepoints up to checkpoint.last_time
+    :param digest: (Digest) digest of these timepoints
+
+    :returns: bool
+    """
+    return count == checkpoint.count and digest.hexdigest() == checkpoint.digest
+
+def new_timepoints(lis_struct, checkpoint, digest):
+    """
+    Returns the timepoints of a file that come after a checkpoint, and feeds
+    all timepoints of the file to digest (for the next checkpoint).
+
+    :param lis_struct: (dict) {time -> {item -> entry}}, as loaded
+    :param checkpoint: (Checkpoint) checkpoint of the file, or None
+    :param digest: (Digest) digest to feed
+
+    :returns: dict {time -> {item -> entry}}, or None if there is no
+        checkpoint or the timepoints up to it are not those it was written for
+    """
+    new = {}
+    count = 0
+    resumed = checkpoint is None
+    for time in sorted(lis_struct):
+        if checkpoint is not None and time > checkpoint.last_time:
+            if not resumed:
+                resumed = True
+                checkpoint = checkpoint if matches(checkpoint, count, digest) else None
+            if checkpoint is not None:
+                new[time] = lis_struct[time]
+        else:
+            count += 1
+        digest.update(time, lis_struct[time])
+    if not resumed and not matches(checkpoint, count, digest):
+        checkpoint = None
+    if checkpoint is None:
+        return None
+    return new
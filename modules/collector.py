@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Result collector of lisanalyze.py.
+#
+# Results are handed over one file at a time, as soon as each file has been
+# analyzed, and are written out immediately; the collector only keeps
+# counters, so memory stays flat and run time grows linearly with the number
+# of files in a batch.
+#
+# Results are written to one result file per patient, or, for the patients of
+# a bundle or export (--bundle-output), to one result file per bundle, holding
+# an object keyed by patient ID. With --output-format ndjson, all results go
+# instead to a single NDJSON stream (the file given with -o, or stdout), one
+# line per patient, through a large write buffer. Each result is serialized
+# once, whatever it is written to. With --atomic, result files are written
+# to a temporary file first and then renamed, so a reader sees either a
+# complete result file or none.
+#
+# With --event-store, events are also added to an event store
+# (modules.eventstore), committed every 1000 patients and at the end.
+#
+# With --delta, only the events that are new or resolved since the previous
+# run are written (modules.delta). A patient without any is left out, and
+# their result file from an earlier run removed, so that what is written (and
+# published) grows with the number of changes rather than with the history.
+#
+# Events are written as structured records (modules.events), and rendered as
+# text only for human-readable output (-r).
+
+import datetime
+import json
+import os
+import sys
+
+import modules.delta
+import modules.events
+import modules.eventstore
+
+class ResultCollector(object):
+    """
+    Writes the events of each analyzed file and drops them.
+    """
+    __slots__ = ("args", "files", "events", "bundle", "bundle_path", "bundle_patients", "stream", "stream_path", "event_store")
+
+    def __init__(self, args):
+        """
+        :param args: (dict) switches provided to lisanalyze.py via argparse
+        """
+        self.args = args
+        # Number of files and events seen so far
+        self.files = 0
+        self.events = 0
+        # Result file of the current bundle, if any, and patients written to it
+        self.bundle = None
+        self.bundle_path = None
+        self.bundle_patients = 0
+        # NDJSON stream of all results, if any, and its path (None: stdout)
+        self.stream = None
+        self.stream_path = None
+        if args.output_format == 'ndjson':
+            if args.output in (None, '-'):
+                self.stream = sys.stdout
+            else:
+                self.stream_path = args.output
+                self.stream = self.__open(args.output, 1024 * 1024)
+        # Event store, if any
+        self.event_store = None
+        if args.event_store is not None:
+            self.event_store = modules.eventstore.connect(args.event_store)
+
+    def close(self):
+        """
+        Finishes writing results; must be called once all results are added.
+        """
+        if self.event_store is not None:
+            self.event_store.commit()
+            self.event_store.close()
+            self.event_store = None
+        if self.stream is None:
+            return
+        if self.stream_path is None:
+            self.stream.flush()
+        else:
+            self.__close(self.stream, self.stream_path)
+        self.stream = None
+
+    def __open(self, path, buffering=-1):
+        if self.args.atomic:
+            return open("{}.{}.tmp".format(path, os.getpid()), mode='w', buffering=buffering)
+        return open(path, mode='w', buffering=buffering)
+
+    def __close(self, f, path):
+        f.close()
+        if f.name != path:
+            os.replace(f.name, path)
+
+    def begin_bundle(self, file_name):
+        """
+        Starts writing the results of the patients of a bundle to a single
+        result file, until end_bundle() is called.
+
+        :param file_name: (str) name of the bundle file
+        """
+        if self.stream is not None:
+            # Patients are lines of the stream anyway
+            return
+        self.bundle_path = os.path.join(os.path.normpath(self.args.dir), file_name) + self.args.suffix
+        self.bundle = self.__open(self.bundle_path)
+        self.bundle.write("{")
+        self.bundle_patients = 0
+
+    def end_bundle(self):
+        """
+        Finishes the result file of the current bundle.
+        """
+        if self.bundle is None:
+            return
+        self.bundle.write("}\n")
+        self.__close(self.bundle, self.bundle_path)
+        self.bundle = None
+
+    def add(self, file_name, results):
+        """
+        Writes the results of one file to stdout and to its result file, or
+        to the NDJSON stream.
+
+        :param file_name: (str) name of the analyzed file
+        :param results: (dict) {event_time -> [Event]}
+        """
+        self.files += 1
+        analysis_time = datetime.datetime.now().isoformat()
+        if self.event_store is not None and results:
+            modules.eventstore.add(self.event_store, file_name, results, analysis_time)
+            if self.files % 1000 == 0:
+                self.event_store.commit()
+        if self.args.delta:
+            results = modules.delta.diff(file_name, results, self.args)
+            if not results:
+                if self.args.human_readable and not self.args.quiet and self.stream is not sys.stdout:
+                    print("Nothing new for data file {}!".format(file_name))
+                if self.stream is None and self.bundle is None:
+                    try:
+                        os.remove(os.path.join(os.path.normpath(self.args.dir), file_name) + self.args.suffix)
+                    except OSError:
+                        pass
+                return
+        if not results:
+            if self.args.human_readable and not self.args.quiet and self.stream is not sys.stdout:
+                print("All is well for data file {}!".format(file_name))
+            return
+        self.events += sum(len(events) for events in results.values())
+        if self.args.human_readable:
+            results = modules.events.render(results)
+        else:
+            results = modules.events.records(results)
+
+        # Add file_name and analysis_time params before we print
+        results["file_name"] = file_name
+        results["analysis_time"] = analysis_time
+
+        line = json.dumps(results)
+        if self.stream is not None:
+            self.stream.write(line + "\n")
+            return
+        print(line)
+        if self.bundle is not None:
+            if self.bundle_patients:
+                self.bundle.write(",\n")
+            self.bundle.write("{}: {}".format(json.dumps(file_name), line))
+            self.bundle_patients += 1
+            return
+        path = os.path.join(os.path.normpath(self.args.dir), file_name) + self.args.suffix
+        outfile = self.__open(path)
+        outfile.write(line + "\n")
+        self.__close(outfile, path)
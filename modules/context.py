@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Per-patient analysis state.
+#
+# lisanalyze.py creates one PatientContext per input file and passes it to
+# every analyzer call for that file. Analyzers record their events in it and
+# keep whatever they need to remember between timepoints (e.g. the PSA nadir)
+# in a state object stored under their own name, instead of in module-level
+# globals. Converted values and derived quantities (modules.derived) are
+# computed once and shared through ctx.quantities. The context is discarded
+# once the file's results are collected, so nothing leaks from one patient
+# into the next.
+
+import modules.episodes
+import modules.events
+
+class PatientContext(object):
+    """
+    Events and analyzer state of one patient (one input file).
+    """
+    __slots__ = ("file_name", "events", "state", "quantities", "episodes")
+
+    def __init__(self, file_name, quantities=None, episodes=False):
+        """
+        :param file_name: (str) name of the input file being analyzed
+        :param quantities: (Quantities) converted and derived values of the
+            patient (optional)
+        :param episodes: (bool) collapse repeated events into episodes (see
+            modules.episodes)
+        """
+        self.file_name = file_name
+        # event_time -> [Event] (or [Episode], with episodes)
+        self.events = {}
+        # analyzer name -> analyzer state object
+        self.state = {}
+        self.quantities = quantities
+        self.episodes = episodes
+
+    def add_event(self, event_time, event):
+        """
+        Records an event.
+
+        :param event_time: (str) ISO8601-formatted time of the event
+        :param event: (Event) the event (see modules.events); a str holding
+            the name of the event and associated info is also accepted
+        """
+        if self.episodes and isinstance(event, modules.events.Event):
+            modules.episodes.add(self, event_time, event)
+            return
+        if event_time not in self.events:
+            self.events[event_time] = []
+        self.events[event_time].append(event)
+
+    def get_state(self, name, factory):
+        """
+        Returns the state object of an analyzer, creating it on first use.
+
+        :param name: (str) name of the analyzer (usually its __name__)
+        :param factory: (callable) returns a new state object
+
+        :returns: state object
+        """
+        if name not in self.state:
+            self.state[name] = factory()
+        return self.state[name]
+
+    def results(self):
+        """
+        Returns the events recorded for this patient, in time order.
+
+        :returns: dict {event_time -> [Event]}
+        """
+        return dict((event_time, self.events[event_time]) for event_time in sorted(self.events))
@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# SQLite database of lab results (--input-format sqlite).
+#
+# Results are kept in one table keyed on (patient_id, analyte, time), with
+# item names already normalized to their standard names, so the rows of a
+# patient come out of a primary key range scan grouped by analyte and in time
+# order: the columns of modules.series, without sorting. lisdb.py adds data
+# files, bundles or exports to a database with upserts: new results are
+# inserted, changed results replaced, and unchanged results left alone.
+#
+# Each ingest run has a revision number; a patient's row in the patients
+# table records the revision that last added or changed any of their results
+# (updated) and the revision their last analysis saw (analyzed). A partial
+# index over the patients with updated > analyzed lets lisanalyze.py
+# --incremental analyze only those, instead of reading every patient again.
+# The analyzers and switches of the last analysis are recorded as well; when
+# they change, all patients are analyzed again.
+
+import sqlite3
+
+import modules.series
+
+# Variables local to module
+__version = 1
+__schema = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS results (
+    patient_id TEXT NOT NULL,
+    analyte TEXT NOT NULL,
+    time TEXT NOT NULL,
+    lab_value,
+    unit,
+    ref_low,
+    ref_high,
+    PRIMARY KEY (patient_id, analyte, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    updated INTEGER NOT NULL,
+    analyzed INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS patients_pending ON patients (patient_id) WHERE updated > analyzed;
+"""
+__upsert = """
+INSERT INTO results (patient_id, analyte, time, lab_value, unit, ref_low, ref_high)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (patient_id, analyte, time) DO UPDATE SET
+    lab_value = excluded.lab_value, unit = excluded.unit,
+    ref_low = excluded.ref_low, ref_high = excluded.ref_high
+WHERE (lab_value, unit, ref_low, ref_high) IS NOT
+    (excluded.lab_value, excluded.unit, excluded.ref_low, excluded.ref_high)
+"""
+
+def connect(path, analyzers):
+    """
+    Opens a database, creating it if needed.
+
+    :param path: (str) path of SQLite database file
+    :param analyzers: (Registry) analyzer registry; the database must hold
+        data normalized with the same item names
+
+    :returns: sqlite3.Connection
+    """
+    db = sqlite3.connect(path, timeout=60)
+    db.executescript(__schema)
+    meta = dict(db.execute("SELECT key, value FROM meta"))
+    if not meta:
+        with db:
+            db.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                [("version", __version), ("items", analyzers.index_digest), ("revision", 0)])
+    elif meta.get("version") != __version:
+        db.close()
+        raise Exception("Database of unsupported version")
+    elif meta.get("items") != analyzers.index_digest:
+        db.close()
+        raise Exception("Database built with other item names; ingest the data again into a new database")
+    return db
+
+def ingest(db, patients):
+    """
+    Adds the data of patients to a database, as one revision.
+
+    :param db: (sqlite3.Connection) database, as returned by connect()
+    :param patients: (iterable) tuples (patient_id, {time -> {item -> entry}}),
+        validated and normalized (see modules.loader)
+
+    :returns: tuple (number of patients, number of results added or changed)
+    """
+    count = 0
+    changed = 0
+    with db:
+        revision = db.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0] + 1
+        db.execute("UPDATE meta SET value = ? WHERE key = 'revision'", (revision,))
+        for patient_id, lis_struct in patients:
+            before = db.total_changes
+            db.executemany(__upsert, ((patient_id, analyte, time, entry.get("lab_value"), entry.get("unit"), entry.get("ref_low"), entry.get("ref_high"))
+                for time, entries in lis_struct.items() for analyte, entry in entries.items()))
+            if db.total_changes != before:
+                changed += db.total_changes - before
+                db.execute("INSERT INTO patients (patient_id, updated) VALUES (?, ?) ON CONFLICT (patient_id) DO UPDATE SET updated = excluded.updated",
+                    (patient_id, revision))
+            count += 1
+    return count, changed
+
+def select(db, fingerprint, pending_only):
+    """
+    Returns the patients to analyze. If the analyzers or switches have
+    changed since the last analysis, all patients are marked as pending.
+
+    :param db: (sqlite3.Connection) database, as returned by connect()
+    :param fingerprint: (bytes) analyzers and switches of this analysis (see
+        modules.cache.fingerprint())
+    :param pending_only: (bool) only select patients with results added or
+        changed since they were last analyzed
+
+    :returns: list of tuples (patient_id, revision)
+    """
+    with db:
+        row = db.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint.hex():
+            db.execute("UPDATE patients SET analyzed = 0")
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint.hex(),))
+    if pending_only:
+        return db.execute("SELECT patient_id, updated FROM patients WHERE updated > analyzed ORDER BY patient_id").fetchall()
+    return db.execute("SELECT patient_id, updated FROM patients ORDER BY patient_id").fetchall()
+
+def mark_analyzed(db, patient_id, revision):
+    """
+    Records that a patient has been analyzed up to a revision; committed by
+    the caller.
+
+    :param db: (sqlite3.Connection) database, as returned by connect()
+    :param patient_id: (str) patient ID
+    :param revision: (int) revision seen by the analysis, as returned by select()
+    """
+    db.execute("UPDATE patients SET analyzed = ? WHERE patient_id = ? AND analyzed < ?", (revision, patient_id, revision))
+
+def timeline(db, patient_id):
+    """
+    Reads the results of a patient into a Timeline, from a range scan of the
+    results table.
+
+    :param db: (sqlite3.Connection) database, as returned by connect()
+    :param patient_id: (str) patient ID
+
+    :returns: Timeline
+    """
+    rows = db.execute("SELECT analyte, time, lab_value, unit, ref_low, ref_high FROM results WHERE patient_id = ? ORDER BY analyte, time",
+        (patient_id,)).fetchall()
+    timeline = modules.series.Timeline()
+    ranks = None
+    for analyte, time, lab_value, unit, ref_low, ref_high in rows:
+        epoch = modules.series.to_epoch(time)
+        if epoch is None:
+            # Times not in ISO8601 format (--compat): keep their sort order
+            if ranks is None:
+                ranks = dict((t, i) for i, t in enumerate(sorted(set(row[1] for row in rows))))
+            epoch = ranks[time]
+        entry = {"lab_value": lab_value, "unit": unit}
+        if ref_low is not None:
+            entry["ref_low"] = ref_low
+        if ref_high is not None:
+            entry["ref_high"] = ref_high
+        if analyte not in timeline:
+            timeline[analyte] = modules.series.Series(analyte)
+        timeline[analyte].append(time, epoch, entry)
+    return timeline
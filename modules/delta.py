@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Delta output (--delta): only the events that are new or resolved since the
+# previous run.
+#
+# Each event gets a stable ID, a digest of the patient, the event time and
+# the event code (for an episode, its start time), so the same event found by
+# two runs has the same ID. After each patient, the events of the run are
+# saved next to its result file (<file>.events, in JSON) and compared with
+# those of the previous run: events not found last time are written as new,
+# events found last time but not this time as resolved, and events found both
+# times are left out. A patient analyzed for the first time has all its
+# events new. Event files are written to a temporary file first and then
+# renamed, so an interrupted run never leaves a truncated one behind.
+
+import hashlib
+import json
+import os
+
+import modules.events
+
+# Variables local to module
+__version = 1
+__suffix = ".events"
+
+def path(file_name, args):
+    """
+    Returns the path of the event file of an input file (or patient).
+    """
+    return os.path.join(os.path.normpath(args.dir), file_name) + __suffix
+
+def event_id(patient_id, event_time, event):
+    """
+    Returns the stable ID of an event.
+
+    :param patient_id: (str) patient ID (or file name)
+    :param event_time: (str) ISO8601-formatted time of the event
+    :param event: (Event, Episode or str) the event
+
+    :returns: str
+    """
+    if isinstance(event, modules.events.Episode):
+        code = event.event.code
+    elif isinstance(event, modules.events.Event):
+        code = event.code
+    else:
+        # Events recorded as text: the text is their code
+        code = event
+    return hashlib.sha256(json.dumps([patient_id, event_time, code]).encode()).hexdigest()[:16]
+
+def diff(file_name, results, args):
+    """
+    Returns the events of results that are new since the previous run, and
+    those of the previous run that are resolved, and saves the events of
+    results for the next run.
+
+    :param file_name: (str) name of the analyzed file (or patient ID)
+    :param results: (dict) {event_time -> [Event, Episode or str]}
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+
+    :returns: dict {event_time -> [Change]}, in time order
+    """
+    previous = __load(path(file_name, args))
+    current = {}
+    for event_time, events in results.items():
+        for event in events:
+            current[event_id(file_name, event_time, event)] = (event_time, event)
+
+    delta = {}
+    for id, (event_time, event) in current.items():
+        if id not in previous:
+            delta.setdefault(event_time, []).append(modules.events.Change(modules.events.NEW, id, event))
+    for id, (event_time, record) in previous.items():
+        if id not in current:
+            event = modules.events.from_dict(record) if isinstance(record, dict) else record
+            delta.setdefault(event_time, []).append(modules.events.Change(modules.events.RESOLVED, id, event))
+
+    __save(path(file_name, args), dict((id, (event_time, event.as_dict() if not isinstance(event, str) else event)) for id, (event_time, event) in current.items()))
+    return dict((event_time, delta[event_time]) for event_time in sorted(delta))
+
+def __load(event_path):
+    try:
+        with open(event_path, 'r') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        # First run, or damaged: every event is new
+        return {}
+    if not isinstance(saved, dict) or saved.get("version") != __version:
+        return {}
+    return saved["events"]
+
+def __save(event_path, events):
+    temp_path = "{}.{}.tmp".format(event_path, os.getpid())
+    with open(temp_path, 'w') as f:
+        json.dump({"version": __version, "events": events}, f)
+    os.replace(temp_path, event_path)
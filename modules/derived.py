@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Derived quantities and their dependency graph.
+#
+# Some rules need more than one item: sodium corrected for glucose, calcium
+# corrected for albumin, the BUN/Cr and AST/ALT ratios. Analyzer modules
+# declare such quantities in a dict named DERIVED:
+#
+#     DERIVED = {
+#         "BUN/Cr": (("BUN", "Cr"), modules.derived.ratio),
+#     }
+#
+# mapping the name of each quantity to its inputs and to a function called
+# as function(args, *inputs) with one numpy.ndarray per input. Inputs are
+# items with a rule table (RULES, or INPUTS for items that no module
+# analyzes, which gives their unit only) or other derived quantities. A
+# quantity has a value at each timepoint of its first input; other inputs are
+# taken at the same times, NaN where missing.
+#
+# The registry builds a single Graph from all modules at startup, checking
+# that every input is known and that there is no cycle. For each patient, a
+# Quantities object computes each item's converted values and each derived
+# quantity when first asked for (computing its inputs first, recursively), at
+# most once, over all timepoints at a time, and caches them for every
+# analyzer that reads them.
+
+import numpy
+
+import modules.rules as rules
+
+def ratio(args, numerator, denominator):
+    """
+    Returns numerator / denominator, NaN or inf where undefined.
+    """
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+class Graph(object):
+    """
+    Rule tables of items and definitions of derived quantities.
+    """
+    __slots__ = ("tables", "nodes")
+
+    def __init__(self, tables, nodes):
+        """
+        :param tables: (dict) item name -> rule table
+        :param nodes: (dict) derived quantity name -> (inputs, function)
+        """
+        self.tables = dict(tables)
+        self.nodes = dict(nodes)
+        for name in self.nodes:
+            if name in self.tables:
+                raise Exception("Derived quantity {} has the name of an item".format(name))
+        # Depth-first search for unknown inputs and cycles
+        checked = set()
+        visiting = set()
+        def visit(name):
+            if name in self.tables or name in checked:
+                return
+            if name not in self.nodes:
+                raise Exception("Unknown input {} of a derived quantity".format(name))
+            if name in visiting:
+                raise Exception("Derived quantity {} depends on itself".format(name))
+            visiting.add(name)
+            for input_name in self.nodes[name][0]:
+                visit(input_name)
+            visiting.remove(name)
+            checked.add(name)
+        for name in sorted(self.nodes):
+            visit(name)
+
+class Quantities(object):
+    """
+    Converted items and derived quantities of one patient, each computed at
+    most once.
+    """
+    __slots__ = ("graph", "timeline", "args", "values", "aligned")
+
+    def __init__(self, graph, timeline, args):
+        """
+        :param graph: (Graph) dependency graph, as built by the registry
+        :param timeline: (Timeline) series of the patient
+        :param args: (dict) switches provided to lisanalyze.py via argparse
+        """
+        self.graph = graph
+        self.timeline = timeline
+        self.args = args
+        # name -> numpy.ndarray, at the times of anchor(name)
+        self.values = {}
+        # (name, series name) -> numpy.ndarray, at the times of that series
+        self.aligned = {}
+
+    def anchor(self, name):
+        """
+        Returns the series whose timepoints a quantity is computed at.
+
+        :param name: (str) item or derived quantity name
+
+        :returns: Series, or None if the patient has no such timepoints
+        """
+        while name in self.graph.nodes:
+            name = self.graph.nodes[name][0][0]
+        return self.timeline.get(name)
+
+    def get(self, name):
+        """
+        Returns the values of an item (in the unit of its rule table) or of a
+        derived quantity, at the times of anchor(name).
+
+        :param name: (str) item or derived quantity name
+
+        :returns: numpy.ndarray of float64, or None if anchor(name) is None
+        """
+        if name in self.values:
+            return self.values[name]
+        anchor = self.anchor(name)
+        if anchor is None:
+            return None
+        if name in self.graph.tables:
+            values = rules.convert(anchor, self.graph.tables[name], self.args)
+        else:
+            inputs, function = self.graph.nodes[name]
+            values = function(self.args, *[self.at(input_name, anchor) for input_name in inputs])
+        self.values[name] = values
+        return values
+
+    def at(self, name, series):
+        """
+        Returns the values of an item or derived quantity at the times of a
+        series.
+
+        :param name: (str) item or derived quantity name
+        :param series: (Series) series whose times are wanted
+
+        :returns: numpy.ndarray of float64, NaN where name has no value
+        """
+        key = (name, series.name)
+        if key in self.aligned:
+            return self.aligned[key]
+        anchor = self.anchor(name)
+        if anchor is series:
+            values = self.get(name)
+        elif anchor is None:
+            values = numpy.full(len(series), numpy.nan)
+        else:
+            values = rules.align(series, anchor, self.get(name))
+        self.aligned[key] = values
+        return values
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Episode compaction of events (--episodes).
+#
+# Patients who stay abnormal (e.g. persistent hyperkalemia on dialysis) would
+# get the same event at every timepoint. With --episodes, events with the
+# same code found at consecutive timepoints of their item are collapsed, as
+# they are recorded, into one modules.events.Episode holding the start and
+# end times, the number of events and the most extreme of them (the one whose
+# value is farthest from its limit). An episode ends at the first timepoint
+# of the item without the event. Results then grow with the number of
+# episodes rather than with the number of timepoints.
+#
+# Timepoints are those of the series the event is computed at (for derived
+# quantities, e.g. the AST/ALT ratio, that of their first input). Open
+# episodes are kept in the patient's context, as analyzer state, so that they
+# carry over from batch to batch (--stream) and from run to run
+# (--incremental).
+
+import bisect
+
+import modules.events
+
+class EpisodeState(object):
+    """
+    Open episodes of one patient.
+    """
+    __slots__ = ("open", "last_times")
+
+    def __init__(self):
+        # code -> last Episode of that code
+        self.open = {}
+        # series name -> time of its last timepoint in earlier batches
+        self.last_times = {}
+
+def add(ctx, event_time, event):
+    """
+    Records an event in ctx, extending the last episode of the same code if
+    it ended at the previous timepoint of the event's item.
+
+    :param ctx: (PatientContext) context of the patient being analyzed
+    :param event_time: (str) ISO8601-formatted time of the event
+    :param event: (Event) the event
+    """
+    state = ctx.get_state(__name__, EpisodeState)
+    episode = state.open.get(event.code)
+    if episode is not None and __follows(ctx, state, event.analyte, episode.end, event_time):
+        episode.end = event_time
+        episode.count += 1
+        if __distance(event) > __distance(episode.event):
+            episode.event = event
+        return
+    episode = modules.events.Episode(event_time, event)
+    state.open[event.code] = episode
+    if event_time not in ctx.events:
+        ctx.events[event_time] = []
+    ctx.events[event_time].append(episode)
+
+def close_batch(ctx, timeline):
+    """
+    Notes the last timepoint of each series of a batch, once all analyzers
+    have been called, so that episodes can go on in the next batch.
+
+    :param ctx: (PatientContext) context of the patient being analyzed
+    :param timeline: (Timeline) series of the batch
+    """
+    state = ctx.state.get(__name__)
+    if state is None:
+        return
+    for name, series in timeline.items():
+        if len(series):
+            state.last_times[name] = series.times[len(series) - 1]
+
+def __follows(ctx, state, analyte, end, time):
+    # Whether time is the timepoint right after end in the series of analyte
+    if ctx.quantities is None:
+        return False
+    series = ctx.quantities.anchor(analyte)
+    if series is None:
+        return False
+    i = bisect.bisect_left(series.times, time)
+    if i > 0:
+        return series.times[i - 1] == end
+    return state.last_times.get(series.name) == end
+
+def __distance(event):
+    try:
+        distance = abs(float(event.value) - float(event.limit))
+    except (TypeError, ValueError):
+        return 0.0
+    if distance != distance:
+        return 0.0
+    return distance
@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Structured event records.
+#
+# Analyzers record events as Event objects rather than as text: a code, the
+# analyte, a severity, the value and limit involved, their unit, and the
+# template of the event's text (shared by all events of the same kind, e.g.
+# the texts of a rule table). Text is only rendered when results are written
+# in human-readable form (-r); otherwise events are written as JSON objects
+# holding the same fields, so that consumers can filter them (e.g. by
+# severity) without parsing text, and render them themselves with
+#
+#     event["text"].format(value=event["value"], limit=event["limit"],
+#                          unit=event["unit"], **event.get("detail", {}))
+#
+# Events with more values than one value and one limit (e.g. the AST/ALT
+# ratio and both its terms) keep the others in detail, a dict. Values that
+# are not finite (e.g. a PSA reported as ">100", read as infinity) are
+# written as null, as JSON has no such numbers.
+#
+# With --episodes (modules.episodes), repeated events are collapsed into
+# Episode records, written as the fields of their most extreme event plus
+# start, end and count.
+#
+# With --delta (modules.delta), events are written as Change records: the
+# fields of the event plus its stable ID and its status, NEW or RESOLVED.
+
+import math
+
+# Severities, in increasing order
+NOTICE = "notice"
+ABNORMAL = "abnormal"
+PANIC = "panic"
+SEVERITIES = (NOTICE, ABNORMAL, PANIC)
+
+# Statuses of changes
+NEW = "new"
+RESOLVED = "resolved"
+
+def finite(value):
+    """
+    Returns value, or None if it is a number that is not finite.
+
+    :param value: value of an event
+
+    :returns: value or None
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+class Event(object):
+    """
+    One event found by an analyzer.
+    """
+    __slots__ = ("code", "analyte", "severity", "value", "limit", "unit", "text", "detail")
+
+    def __init__(self, code, analyte, severity, text, value=None, limit=None, unit=None, detail=None):
+        """
+        :param code: (str) kind of event, e.g. "K.panic_high"
+        :param analyte: (str) standard item name (or derived quantity)
+        :param severity: (str) NOTICE, ABNORMAL or PANIC
+        :param text: (str) template of the event's text, formatted with
+            {value}, {limit}, {unit} and the keys of detail
+        :param value: value involved (optional)
+        :param limit: limit the value was compared with (optional)
+        :param unit: (str) unit of value and limit (optional)
+        :param detail: (dict) other values involved (optional)
+        """
+        self.code = code
+        self.analyte = analyte
+        self.severity = severity
+        self.text = text
+        self.value = value
+        self.limit = limit
+        self.unit = unit
+        self.detail = detail
+
+    def __str__(self):
+        if self.detail:
+            return self.text.format(value=self.value, limit=self.limit, unit=self.unit, **self.detail)
+        return self.text.format(value=self.value, limit=self.limit, unit=self.unit)
+
+    def __repr__(self):
+        return "Event({!r}, {!r})".format(self.code, str(self))
+
+    def as_dict(self, strict=True):
+        """
+        Returns the event as a JSON-serializable dict (see from_dict()).
+
+        :param strict: (bool) write values that are not finite as None, as
+            JSON has no such numbers (optional; Python's json module reads
+            them back otherwise)
+
+        :returns: dict
+        """
+        value, limit, detail = self.value, self.limit, self.detail
+        if strict:
+            value, limit = finite(value), finite(limit)
+            if detail:
+                detail = dict((key, finite(detail_value)) for key, detail_value in detail.items())
+        event = {"code": self.code, "analyte": self.analyte, "severity": self.severity,
+            "value": value, "limit": limit, "unit": self.unit, "text": self.text}
+        if detail:
+            event["detail"] = detail
+        return event
+
+class Episode(object):
+    """
+    Events of the same code at consecutive timepoints (see modules.episodes).
+    """
+    __slots__ = ("event", "start", "end", "count")
+
+    def __init__(self, start, event, end=None, count=1):
+        """
+        :param start: (str) ISO8601-formatted time of the first event
+        :param event: (Event) most extreme event of the episode
+        :param end: (str) time of the last event (optional; defaults to start)
+        :param count: (int) number of events (optional)
+        """
+        self.event = event
+        self.start = start
+        self.end = start if end is None else end
+        self.count = count
+
+    def __str__(self):
+        if self.count == 1:
+            return str(self.event)
+        return "{} ({} times from {} to {})".format(self.event, self.count, self.start, self.end)
+
+    def __repr__(self):
+        return "Episode({!r}, {!r})".format(self.event.code, str(self))
+
+    def as_dict(self, strict=True):
+        """
+        Returns the episode as a JSON-serializable dict (see from_dict()).
+
+        :param strict: (bool) see Event.as_dict() (optional)
+
+        :returns: dict
+        """
+        episode = self.event.as_dict(strict)
+        episode["start"] = self.start
+        episode["end"] = self.end
+        episode["count"] = self.count
+        return episode
+
+class Change(object):
+    """
+    An event that is new, or resolved, since the previous run (see
+    modules.delta).
+    """
+    __slots__ = ("status", "id", "event")
+
+    def __init__(self, status, id, event):
+        """
+        :param status: (str) NEW or RESOLVED
+        :param id: (str) stable ID of the event
+        :param event: (Event, Episode or str) the event
+        """
+        self.status = status
+        self.id = id
+        self.event = event
+
+    def __str__(self):
+        if self.status == RESOLVED:
+            return "Resolved: {}".format(self.event)
+        return str(self.event)
+
+    def __repr__(self):
+        return "Change({!r}, {!r})".format(self.status, str(self))
+
+    def as_dict(self, strict=True):
+        """
+        Returns the change as a JSON-serializable dict.
+
+        :param strict: (bool) see Event.as_dict() (optional)
+
+        :returns: dict
+        """
+        if isinstance(self.event, str):
+            change = {"text": self.event}
+        else:
+            change = self.event.as_dict(strict)
+        change["id"] = self.id
+        change["status"] = self.status
+        return change
+
+def from_dict(event):
+    """
+    Returns the Event (or Episode) written as a dict by as_dict().
+
+    :param event: (dict) event as written
+
+    :returns: Event or Episode
+    """
+    record = Event(event["code"], event["analyte"], event["severity"], event["text"],
+        event.get("value"), event.get("limit"), event.get("unit"), event.get("detail"))
+    if "count" in event:
+        return Episode(event["start"], record, event["end"], event["count"])
+    return record
+
+def render(results):
+    """
+    Renders the events of results as text.
+
+    :param results: (dict) {event_time -> [Event, Episode, Change or str]}
+
+    :returns: dict {event_time -> [event_str]}
+    """
+    return dict((event_time, [str(event) for event in events]) for event_time, events in results.items())
+
+def records(results, strict=True):
+    """
+    Converts the events of results to JSON-serializable dicts; events
+    recorded as text (by modules predating Event) are kept as they are.
+
+    :param results: (dict) {event_time -> [Event, Episode, Change or str]}
+    :param strict: (bool) see Event.as_dict() (optional)
+
+    :returns: dict {event_time -> [dict or str]}
+    """
+    return dict((event_time, [event.as_dict(strict) if isinstance(event, (Event, Episode, Change)) else event for event in events]) for event_time, events in results.items())
+
+def from_records(results):
+    """
+    Reverses records().
+
+    :param results: (dict) {event_time -> [dict or str]}
+
+    :returns: dict {event_time -> [Event, Episode or str]}
+    """
+    return dict((event_time, [from_dict(event) if isinstance(event, dict) else event for event in events]) for event_time, events in results.items())
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Event store: SQLite database of the events found by lisanalyze.py
+# (--event-store), queried with lisquery.py and read by lispublish.py.
+#
+# Finding e.g. all patients with severe hyperkalemia in the last 24 hours
+# from result files means reading every one of them. The event store keeps
+# every event found, one row per patient, event time and event code, with its
+# severity (as a rank, see modules.events.SEVERITIES), analyte and record (the
+# event as written to result files, in JSON). Rows are only added: events are
+# never removed, and an event found again by a later run is left alone (an
+# episode, modules.episodes, has its record replaced as it grows). The key is
+# (patient_id, time, code), so a patient's events come out of a range scan;
+# events are also indexed by time, by code and time, and by severity and
+# time, so time-window and event-type queries read only matching rows.
+#
+# The database is in WAL mode, so it can be queried while lisanalyze.py is
+# writing to it.
+
+import datetime
+import json
+import sqlite3
+
+import modules.events
+
+# Variables local to module
+__version = 1
+__schema = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    patient_id TEXT NOT NULL,
+    time TEXT NOT NULL,
+    code TEXT NOT NULL,
+    severity INTEGER NOT NULL,
+    analyte TEXT,
+    record TEXT NOT NULL,
+    added TEXT NOT NULL,
+    PRIMARY KEY (patient_id, time, code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_time ON events (time);
+CREATE INDEX IF NOT EXISTS events_code ON events (code, time);
+CREATE INDEX IF NOT EXISTS events_severity ON events (severity, time);
+"""
+__insert = """
+INSERT INTO events (patient_id, time, code, severity, analyte, record, added)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (patient_id, time, code) DO UPDATE SET record = excluded.record
+WHERE record IS NOT excluded.record
+"""
+
+def connect(path):
+    """
+    Opens an event store, creating it if needed.
+
+    :param path: (str) path of SQLite database file
+
+    :returns: sqlite3.Connection
+    """
+    db = sqlite3.connect(path, timeout=60)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.executescript(__schema)
+    row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None:
+        with db:
+            db.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (__version,))
+    elif row[0] != __version:
+        db.close()
+        raise Exception("Event store of unsupported version")
+    return db
+
+def add(db, patient_id, results, analysis_time):
+    """
+    Adds the events of a patient to an event store; committed by the caller.
+
+    :param db: (sqlite3.Connection) event store, as returned by connect()
+    :param patient_id: (str) patient ID (or file name)
+    :param results: (dict) {event_time -> [Event, Episode or str]}
+    :param analysis_time: (str) ISO8601-formatted time of the analysis
+    """
+    rows = []
+    for event_time, events in results.items():
+        for event in events:
+            if isinstance(event, (modules.events.Event, modules.events.Episode)):
+                record = event.as_dict()
+                rows.append((patient_id, event_time, record["code"], modules.events.SEVERITIES.index(record["severity"]),
+                    record["analyte"], json.dumps(record), analysis_time))
+            else:
+                # Events recorded as text: the text is their code
+                rows.append((patient_id, event_time, event, 0, None, json.dumps(event), analysis_time))
+    db.executemany(__insert, rows)
+
+def query(db, patient_ids=None, codes=None, analytes=None, severity=None, since=None, until=None, limit=None):
+    """
+    Returns the events matching all the conditions given, in order of
+    patient ID and time.
+
+    :param db: (sqlite3.Connection) event store, as returned by connect()
+    :param patient_ids: (list) patient IDs (optional)
+    :param codes: (list) event codes, e.g. "K.panic_high"; a code ending with
+        "*" matches every code starting with the rest (optional)
+    :param analytes: (list) analytes (optional)
+    :param severity: (str) least severity (see modules.events) (optional)
+    :param since: (str) earliest event time, inclusive (optional)
+    :param until: (str) latest event time, inclusive (optional)
+    :param limit: (int) maximum number of events (optional)
+
+    :returns: generator of tuples (patient_id, time, record, added), record
+        being a dict as written by as_dict(), or the text of an event recorded
+        as text, and added the analysis time of the run that added it
+    """
+    where = []
+    params = []
+    for column, values in (("patient_id", patient_ids), ("analyte", analytes)):
+        if values:
+            where.append("{} IN ({})".format(column, ", ".join("?" * len(values))))
+            params.extend(values)
+    if codes:
+        terms = []
+        for code in codes:
+            if code.endswith("*"):
+                # A range, so that the code index is used
+                terms.append("(code >= ? AND code < ?)")
+                params.extend((code[:-1], code[:-1] + "\uffff"))
+            else:
+                terms.append("code = ?")
+                params.append(code)
+        where.append("({})".format(" OR ".join(terms)))
+    if severity is not None:
+        where.append("severity >= ?")
+        params.append(modules.events.SEVERITIES.index(severity))
+    if since is not None:
+        where.append("time >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("time <= ?")
+        params.append(until)
+    sql = "SELECT patient_id, time, record, added FROM events"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY patient_id, time"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    for patient_id, time, record, added in db.execute(sql, params):
+        yield patient_id, time, json.loads(record), added
+
+def hours_ago(hours):
+    """
+    Returns the time a number of hours ago, in the format of event times.
+
+    :param hours: (float) number of hours
+
+    :returns: str
+    """
+    return (datetime.datetime.now() - datetime.timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M")
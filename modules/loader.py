@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Loader stage of lisanalyze.py: reads a JSON-formatted LIS data file,
+# validates it and normalizes item names, so that analyzer modules receive
+# timepoints whose items are already under their standard names. The
+# pipeline then converts it into per-item columns (see modules.series).
+#
+# With --input-cache, like Python's .pyc files, the loaded, validated and
+# normalized data is saved (pickled) in a __lispycache__ directory next to
+# the data file, and read from there next time instead of the JSON file, as
+# long as the data file has the same path, modification time and size, and
+# the loader version, the analyzers' item names, --compat and
+# --full-validation are the same. Cache files are unpickled, so the cache is
+# off by default: only use it on directories no one else can write to.
+# Cache files are written to a temporary file first and then renamed, so a
+# reader sees either a complete cache file or none; a cache file that cannot
+# be read or does not match is ignored and replaced.
+#
+# Validation checks the known shape of the data directly: the schema only
+# asks for an object, whose keys are then checked against a precompiled time
+# pattern, and whose entries must be objects holding a string lab_value and
+# unit (and string ref_low and ref_high, if any). With --full-validation, the object is checked against the schema
+# by jsonschema, with a validator built once per process; jsonschema is only
+# imported then.
+
+import io
+import json
+import os
+import pickle
+import re
+
+# Variables local to module
+__version = 1
+__cache_dir = "__lispycache__"
+__time_re = re.compile("[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}")
+__schema = {
+    "$schema": "http://json-schema.org/schema#",
+    "name": "Lab",
+    "type": "object",
+    "definitions": {
+        "entry": {
+            "lab_item": {"type": "string"},
+            "lab_value": {"type": "string"},
+            "unit": {"type": "string"},
+            "date": {"type": "string"},
+            "required": [
+                "lab_item",
+                "lab_value",
+                "unit",
+                "date"
+            ]
+        },
+        "patient_id": {"type": "string"}
+    },
+    "properties": {}
+}
+__validator = None
+
+def load(file_name, args, analyzers):
+    """
+    Reads, validates and normalizes a JSON-formatted LIS data file.
+
+    :param file_name: (str) path of JSON file to read
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry whose index is used to normalize item names
+
+    :returns: dict {time -> {item -> entry}}
+    """
+    key = None
+    if args.input_cache:
+        key = __cache_key(file_name, args, analyzers)
+        lis_struct = __read_cache(file_name, key)
+        if lis_struct is not None:
+            return lis_struct
+
+    with io.open(file_name) as lis_file:
+        try:
+            lis_struct = json.load(lis_file)
+        except ValueError:
+            raise Exception("Invalid JSON file")
+    prepare(lis_struct, args, analyzers)
+    if key is not None:
+        __write_cache(file_name, key, lis_struct)
+    return lis_struct
+
+def prepare(lis_struct, args, analyzers):
+    """
+    Validates decoded LIS data and normalizes its item names, in place.
+
+    :param lis_struct: (dict) {time -> {item -> entry}}, as decoded
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry whose index is used to normalize item names
+    """
+    validate(lis_struct, args)
+    for time in lis_struct.keys():
+        lis_struct[time] = analyzers.normalize(lis_struct[time])
+
+def cache_path(file_name):
+    """
+    Returns the path of the cache file of a data file.
+    """
+    directory, base_name = os.path.split(os.path.abspath(file_name))
+    return os.path.join(directory, __cache_dir, base_name + ".pickle")
+
+def __cache_key(file_name, args, analyzers):
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        # Left for io.open() to report
+        return None
+    return (__version, os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size, analyzers.index_digest, args.compat, args.full_validation)
+
+def __read_cache(file_name, key):
+    if key is None:
+        return None
+    try:
+        with open(cache_path(file_name), 'rb') as cache_file:
+            cached_key, lis_struct = pickle.load(cache_file)
+    except Exception:
+        return None
+    if cached_key != key:
+        return None
+    return lis_struct
+
+def __write_cache(file_name, key, lis_struct):
+    path = cache_path(file_name)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as cache_file:
+            pickle.dump((key, lis_struct), cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except OSError:
+        # e.g. read-only data directory; the cache is only an optimization
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+def validate(lis_struct, args):
+    """
+    Checks decoded LIS data, raising an Exception if it is malformed.
+
+    :param lis_struct: (dict) decoded JSON file
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    """
+    # Basic checks:
+    # 0. Check against schema (only asks for an object; with
+    #    '--full-validation', checked by jsonschema itself)
+    # 1. Time format should be ISO8061 unless overridden by '--compat'
+    # 2. Level 1 values should be dicts
+    # 3. Level 2 values (entries) should be dicts of strings
+    if args.full_validation:
+        __get_validator().validate(lis_struct)
+    elif not isinstance(lis_struct, dict):
+        raise Exception("Top level not a dict")
+
+    match = __time_re.match
+    for time, entries in lis_struct.items():
+        if not args.compat and match(time) is None:
+            raise Exception("Top level keys not ISO8601 formatted")
+        if not isinstance(entries, dict):
+            raise Exception("Level 1 values not dicts")
+        __validate_entries(entries)
+
+def __validate_entries(entries):
+    for entry in entries.values():
+        if not isinstance(entry, dict):
+            raise Exception("Level 2 values not dicts")
+        if not isinstance(entry.get("lab_value"), str) or not isinstance(entry.get("unit"), str):
+            raise Exception("Level 2 values without string lab_value and unit")
+        if not isinstance(entry.get("ref_low", ""), str) or not isinstance(entry.get("ref_high", ""), str):
+            raise Exception("Level 2 values with ref_low or ref_high not strings")
+
+def __get_validator():
+    global __validator
+    if __validator is None:
+        import jsonschema
+        cls = jsonschema.validators.validator_for(__schema)
+        cls.check_schema(__schema)
+        __validator = cls(__schema)
+    return __validator
+
+def check(file_name, args):
+    """
+    Reads and validates a JSON-formatted LIS data file, without normalizing
+    it or using the input cache.
+
+    :param file_name: (str) path of JSON file to read
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+
+    :returns: (str) why the file is invalid, or None if it is valid
+    """
+    try:
+        with io.open(file_name) as lis_file:
+            try:
+                lis_struct = json.load(lis_file)
+            except ValueError:
+                raise Exception("Invalid JSON file")
+        validate(lis_struct, args)
+    except Exception as e:
+        # jsonschema's messages run over several lines
+        return str(e).split("\n", 1)[0]
+    return None
+
+def validate_timepoint(time, entries, args):
+    """
+    Checks one timepoint of LIS data, raising an Exception if it is malformed.
+
+    :param time: (str) top level key
+    :param entries: level 1 value
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    """
+    if not args.compat and __time_re.match(time) is None:
+        raise Exception("Top level keys not ISO8601 formatted")
+    if not isinstance(entries, dict):
+        raise Exception("Level 1 values not dicts")
+    __validate_entries(entries)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Reader for long-format LIS exports (--input-format ndjson).
+#
+# Such an export holds one result per line, as a JSON object with the fields
+# of an entry in JSON_schema.txt plus the patient:
+#
+#     {"patient_id": "123", "date": "2016-01-01T08:00", "lab_item": "K",
+#      "lab_value": "6.5", "unit": "mmol/l", "ref_low": "3.5", "ref_high": "5"}
+#
+# (ref_low and ref_high are optional). patients() groups the rows of an
+# export by patient and time into the {time -> {item -> entry}} form of a
+# data file, one patient at a time, so that exports of any size are analyzed
+# with memory bounded by the largest patient, without writing per-patient
+# files. If the export is sorted (grouped) by patient, this takes a single
+# pass. Otherwise the rows are first spread over temporary bucket files by
+# patient, each bucket small enough to be grouped in memory; patients then
+# come out bucket by bucket rather than in input order.
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+# Variables local to module
+__required = ("patient_id", "date", "lab_item", "lab_value", "unit")
+__optional = ("ref_low", "ref_high")
+# Largest amount of input grouped in memory at a time, in bytes
+__bucket_size = 16 * 1024 * 1024
+__max_buckets = 256
+
+def patients(file_name, assume_sorted=False):
+    """
+    Reads a long-format NDJSON export, yielding the data of each patient.
+
+    :param file_name: (str) path of NDJSON file to read
+    :param assume_sorted: (bool) whether all rows of a patient are
+        consecutive; an Exception is raised if they turn out not to be
+
+    :returns: generator of tuples (patient_id, {time -> {item -> entry}})
+    """
+    with io.open(file_name) as ndjson_file:
+        if assume_sorted:
+            for patient in __group_sorted(__rows(ndjson_file)):
+                yield patient
+            return
+        buckets = min(__max_buckets, os.path.getsize(file_name) // __bucket_size + 1)
+        if buckets == 1:
+            for patient in __group(__rows(ndjson_file)):
+                yield patient
+            return
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bucket_names = [os.path.join(temp_dir, str(i)) for i in range(buckets)]
+            bucket_files = [io.open(name, 'w') for name in bucket_names]
+            try:
+                for patient_id, row, line in __rows(ndjson_file, raw=True):
+                    bucket = int(hashlib.sha1(patient_id.encode()).hexdigest()[:8], 16) % buckets
+                    bucket_files[bucket].write(line)
+            finally:
+                for bucket_file in bucket_files:
+                    bucket_file.close()
+            for name in bucket_names:
+                with io.open(name) as bucket_file:
+                    for patient in __group(__rows(bucket_file)):
+                        yield patient
+                os.remove(name)
+
+def __rows(ndjson_file, raw=False):
+    for line_number, line in enumerate(ndjson_file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise Exception("Invalid JSON in line {}".format(line_number))
+        if not isinstance(row, dict) or not all(isinstance(row.get(field), str) for field in __required):
+            raise Exception("Missing or invalid fields in line {}".format(line_number))
+        if raw:
+            yield row["patient_id"], row, line if line.endswith("\n") else line + "\n"
+        else:
+            yield row["patient_id"], row
+
+def __entry(row):
+    entry = {"lab_value": row["lab_value"], "unit": row["unit"]}
+    for field in __optional:
+        if field in row:
+            entry[field] = row[field]
+    return entry
+
+def __add(lis_struct, row):
+    time = row["date"]
+    if time not in lis_struct:
+        lis_struct[time] = {}
+    lis_struct[time][row["lab_item"]] = __entry(row)
+
+def __group(rows):
+    patients = {}
+    for patient_id, row in rows:
+        if patient_id not in patients:
+            patients[patient_id] = {}
+        __add(patients[patient_id], row)
+    for patient_id in list(patients):
+        yield patient_id, patients.pop(patient_id)
+
+def __group_sorted(rows):
+    seen = set()
+    patient_id = None
+    lis_struct = None
+    for row_patient_id, row in rows:
+        if row_patient_id != patient_id:
+            if patient_id is not None:
+                yield patient_id, lis_struct
+            if row_patient_id in seen:
+                raise Exception("Rows of patient {} are not consecutive; input not sorted by patient".format(row_patient_id))
+            seen.add(row_patient_id)
+            patient_id = row_patient_id
+            lis_struct = {}
+        __add(lis_struct, row)
+    if patient_id is not None:
+        yield patient_id, lis_struct
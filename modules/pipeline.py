@@ -0,0 +1,469 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Per-file analysis pipeline of lisanalyze.py: load a file, run the
+# analyzers over its series and return its events.
+#
+# run() either analyzes files one after another in the current process, or
+# spreads them over a pool of worker processes. Each worker builds its
+# analyzer registry once (and keeps the unit conversion cache warm) for all
+# the files it is given. Results are yielded in input order in both modes, so
+# the output of a parallel run is identical to that of a serial run.
+#
+# With --incremental, each file's analysis resumes from its checkpoint
+# (modules.checkpoint), and a new checkpoint is saved once it is done.
+#
+# Given a result cache (modules.cache), run() first looks up every file by
+# content; only files not found are analyzed (serially or in the pool), and
+# their results are stored for the next run.
+#
+# With --stream, a file is read timepoint by timepoint (modules.stream) and
+# analyzed in batches of timepoints as it is read, instead of being loaded
+# whole; analyzer state is carried from batch to batch in the patient's
+# context, just as from run to run with --incremental. This relies on
+# timepoints being in time order in the file; if they are not, the file is
+# loaded whole after all.
+#
+# run_store() analyzes the patients of a columnar store (modules.store), whose
+# timelines are read in place, without loading or normalizing anything; worker
+# processes each map the store themselves. --incremental does not apply to
+# store input: a store is rebuilt as a whole, and so is analyzed as a whole.
+#
+# run_database() analyzes the patients of a SQLite database (modules.database),
+# reading each from a range scan; with --incremental, only patients whose
+# results were added or changed since their last analysis are analyzed, and
+# each is marked as analyzed once its results have been handed over.
+#
+# Patients read from bundles, exports, stores and databases are yielded under
+# patient_file_name() of their ID, as their results, checkpoints and event
+# files are named after it: IDs come from the data rather than from the
+# command line, and must not reach outside --dir.
+#
+# check() only validates files (--validate-only), spreading them over a pool
+# of worker processes as run() does; workers read and validate the files
+# without loading any analyzer.
+
+import collections
+import io
+import multiprocessing
+import re
+
+import modules.cache
+import modules.checkpoint
+import modules.context
+import modules.database
+import modules.derived
+import modules.loader
+import modules.registry
+import modules.series
+import modules.store
+import modules.stream
+
+# Variables local to module (set in each worker process by __init_worker)
+__analyzers = None
+__args = None
+__store = None
+__db = None
+# Number of timepoints analyzed at a time with --stream
+__batch_size = 1024
+# Characters of patient IDs not kept as they are in file names
+__unsafe = re.compile(r'[%/\\:\0]')
+
+def patient_file_name(patient_id):
+    """
+    Returns the name the results of a patient are written under: its ID, with
+    path separators (and "%", ":" and NUL) percent-encoded, so that it names a
+    file in --dir rather than a path elsewhere.
+
+    :param patient_id: (str) patient ID, as found in the data
+
+    :returns: str
+    """
+    return __unsafe.sub(lambda match: "%{:02X}".format(ord(match.group())), patient_id)
+
+def analyze_file(file_name, args, analyzers):
+    """
+    Analyzes one LIS data file.
+
+    :param file_name: (str) path of JSON file to read
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: dict {event_time -> [Event]}
+    """
+    if args.stream:
+        results = __analyze_stream(file_name, args, analyzers)
+        if results is not None:
+            return results
+
+    # Read, validate and normalize item names once
+    lis_struct = modules.loader.load(file_name, args, analyzers)
+    return analyze_struct(file_name, lis_struct, args, analyzers)
+
+def analyze_struct(file_name, lis_struct, args, analyzers):
+    """
+    Analyzes the loaded LIS data of one patient.
+
+    :param file_name: (str) name of the patient's data (file name or patient
+        ID), used for checkpoints and results
+    :param lis_struct: (dict) {time -> {item -> entry}}, validated and
+        normalized (see modules.loader)
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: dict {event_time -> [Event]}
+    """
+    # Analyzer state lives in a per-patient context, discarded after the file
+    ctx = modules.context.PatientContext(file_name, episodes=args.episodes)
+
+    # With --incremental, pick up where the last run left off
+    if args.incremental and lis_struct:
+        checkpoint = modules.checkpoint.load(file_name, args, analyzers)
+        digest = modules.checkpoint.Digest()
+        new = modules.checkpoint.new_timepoints(lis_struct, checkpoint, digest)
+        if new is not None:
+            ctx.events = checkpoint.events
+            ctx.state = checkpoint.state
+        else:
+            new = lis_struct
+        timeline = modules.series.build_timeline(new)
+    else:
+        timeline = modules.series.build_timeline(lis_struct)
+
+    ctx.quantities = modules.derived.Quantities(analyzers.graph, timeline, args)
+    analyzers.dispatch(ctx, timeline, args)
+    if args.incremental and lis_struct:
+        modules.checkpoint.save(file_name, args, analyzers, ctx, max(lis_struct), len(lis_struct), digest)
+    return ctx.results()
+
+def analyze_timeline(file_name, timeline, args, analyzers):
+    """
+    Analyzes the timeline of one patient.
+
+    :param file_name: (str) name of the patient's data (file name or patient
+        ID), used for results
+    :param timeline: (Timeline) series of the patient
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+
+    :returns: dict {event_time -> [Event]}
+    """
+    ctx = modules.context.PatientContext(file_name, episodes=args.episodes)
+    ctx.quantities = modules.derived.Quantities(analyzers.graph, timeline, args)
+    analyzers.dispatch(ctx, timeline, args)
+    return ctx.results()
+
+def __analyze_stream(file_name, args, analyzers):
+    ctx = modules.context.PatientContext(file_name, episodes=args.episodes)
+    checkpoint = None
+    if args.incremental:
+        checkpoint = modules.checkpoint.load(file_name, args, analyzers)
+    if checkpoint is not None:
+        ctx.events = checkpoint.events
+        ctx.state = checkpoint.state
+    last_time = None
+    count = 0
+    skipped = 0
+    resumed = checkpoint is None
+    # Only needed for the next checkpoint
+    digest = modules.checkpoint.Digest() if args.incremental else None
+    batch = {}
+    with io.open(file_name) as lis_file:
+        for time, entries in modules.stream.timepoints(lis_file):
+            modules.loader.validate_timepoint(time, entries, args)
+            if last_time is not None and time <= last_time:
+                # Out of order; let analyze_file() load the file whole
+                return None
+            last_time = time
+            count += 1
+            entries = analyzers.normalize(entries)
+            if checkpoint is not None and time <= checkpoint.last_time:
+                skipped += 1
+                digest.update(time, entries)
+                continue
+            if not resumed:
+                # Timepoints up to the checkpoint changed; analyze in full
+                if not modules.checkpoint.matches(checkpoint, skipped, digest):
+                    return None
+                resumed = True
+            if digest is not None:
+                digest.update(time, entries)
+            batch[time] = entries
+            if len(batch) == __batch_size:
+                __dispatch(ctx, batch, args, analyzers)
+                batch = {}
+    if not resumed and not modules.checkpoint.matches(checkpoint, skipped, digest):
+        return None
+    __dispatch(ctx, batch, args, analyzers)
+    if args.incremental and count:
+        modules.checkpoint.save(file_name, args, analyzers, ctx, last_time, count, digest)
+    return ctx.results()
+
+def __dispatch(ctx, lis_struct, args, analyzers):
+    timeline = modules.series.build_timeline(lis_struct)
+    ctx.quantities = modules.derived.Quantities(analyzers.graph, timeline, args)
+    analyzers.dispatch(ctx, timeline, args)
+
+def __init_worker(args):
+    global __analyzers
+    global __args
+    __args = args
+    __analyzers = modules.registry.build()
+
+def __init_store_worker(args, path):
+    global __store
+    __init_worker(args)
+    __store = modules.store.Store(path, __analyzers)
+
+def __init_database_worker(args, path):
+    global __db
+    __init_worker(args)
+    __db = modules.database.connect(path, __analyzers)
+
+def __init_check_worker(args):
+    global __args
+    __args = args
+
+def __work_check(file_name):
+    return file_name, modules.loader.check(file_name, __args)
+
+def __work(file_name):
+    return file_name, analyze_file(file_name, __args, __analyzers)
+
+def __work_patient(patient):
+    patient_id, lis_struct = patient
+    patient_id = patient_file_name(patient_id)
+    modules.loader.prepare(lis_struct, __args, __analyzers)
+    return patient_id, analyze_struct(patient_id, lis_struct, __args, __analyzers)
+
+def __work_store(patient_id):
+    return patient_file_name(patient_id), analyze_timeline(patient_id, __store.timeline(patient_id), __args, __analyzers)
+
+def run_store(path, args, analyzers, jobs=1):
+    """
+    Analyzes the patients of a store file, yielding results in the order the
+    patients were added to the store.
+
+    :param path: (str) path of store file (see modules.store)
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+    :param jobs: (int) number of worker processes; 0 means one per CPU
+
+    :returns: generator of tuples (patient_id, {event_time -> [Event]})
+    """
+    store = modules.store.Store(path, analyzers)
+    patient_ids = store.patient_ids()
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    if jobs <= 1 or len(patient_ids) <= 1:
+        for patient_id in patient_ids:
+            yield patient_file_name(patient_id), analyze_timeline(patient_id, store.timeline(patient_id), args, analyzers)
+        return
+
+    # Only patient IDs are sent to the workers; each reads the store itself
+    chunksize = max(1, min(64, len(patient_ids) // (jobs * 4)))
+    pool = multiprocessing.Pool(jobs, __init_store_worker, (args, path))
+    try:
+        for item in pool.imap(__work_store, patient_ids, chunksize):
+            yield item
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+def __work_database(patient_id):
+    return patient_id, analyze_timeline(patient_id, modules.database.timeline(__db, patient_id), __args, __analyzers)
+
+def run_database(path, args, analyzers, jobs=1):
+    """
+    Analyzes the patients of a database, yielding results in order of
+    patient ID. A patient is marked as analyzed when the caller asks for the
+    next result, i.e. once its results have been written out; marks are
+    committed when all patients are done.
+
+    :param path: (str) path of SQLite database file (see modules.database)
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry
+    :param jobs: (int) number of worker processes; 0 means one per CPU
+
+    :returns: generator of tuples (patient_id, {event_time -> [Event]})
+    """
+    db = modules.database.connect(path, analyzers)
+    try:
+        selected = modules.database.select(db, modules.cache.fingerprint(args, analyzers), args.incremental)
+        revisions = dict(selected)
+        patient_ids = [patient_id for patient_id, revision in selected]
+        if jobs == 0:
+            jobs = multiprocessing.cpu_count()
+        if jobs <= 1 or len(patient_ids) <= 1:
+            analyzed = ((patient_id, analyze_timeline(patient_id, modules.database.timeline(db, patient_id), args, analyzers)) for patient_id in patient_ids)
+            pool = None
+        else:
+            chunksize = max(1, min(64, len(patient_ids) // (jobs * 4)))
+            pool = multiprocessing.Pool(jobs, __init_database_worker, (args, path))
+            analyzed = pool.imap(__work_database, patient_ids, chunksize)
+        try:
+            for patient_id, results in analyzed:
+                yield patient_file_name(patient_id), results
+                modules.database.mark_analyzed(db, patient_id, revisions[patient_id])
+        except BaseException:
+            if pool is not None:
+                pool.terminate()
+            raise
+        else:
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.join()
+            # Keep the marks of the patients done, even if interrupted
+            db.commit()
+    finally:
+        db.close()
+
+def run_patients(patients, args, analyzers, jobs=1):
+    """
+    Analyzes the data of patients read from elsewhere than one file per
+    patient (e.g. modules.ndjson), yielding results in the order of patients.
+    patients is consumed as results are yielded, so only a few patients are
+    held in memory at a time, also when spread over worker processes.
+
+    :param patients: (iterable) tuples (patient_id, {time -> {item -> entry}}),
+        as decoded (not yet validated or normalized)
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry, used when jobs is 1
+    :param jobs: (int) number of worker processes; 0 means one per CPU
+
+    :returns: generator of tuples (patient_id, {event_time -> [Event]})
+    """
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    if jobs <= 1:
+        for patient_id, lis_struct in patients:
+            patient_id = patient_file_name(patient_id)
+            modules.loader.prepare(lis_struct, args, analyzers)
+            yield patient_id, analyze_struct(patient_id, lis_struct, args, analyzers)
+        return
+
+    # Pool.imap() would read all of patients ahead; keep a bounded number of
+    # patients in flight instead
+    pool = multiprocessing.Pool(jobs, __init_worker, (args,))
+    pending = collections.deque()
+    try:
+        for patient in patients:
+            pending.append(pool.apply_async(__work_patient, (patient,)))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+def run(file_names, args, analyzers, jobs=1, cache=None):
+    """
+    Analyzes files, yielding results in the order of file_names as soon as
+    they are available.
+
+    :param file_names: (list) paths of JSON files to read
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param analyzers: (Registry) analyzer registry, used when jobs is 1
+    :param jobs: (int) number of worker processes; 0 means one per CPU
+    :param cache: (ResultCache) cache of results by file contents (optional)
+
+    :returns: generator of tuples (file_name, {event_time -> [Event]})
+    """
+    if cache is None:
+        for item in __analyze(file_names, args, analyzers, jobs):
+            yield item
+        return
+
+    # Files that cannot be read are left to the analysis to report
+    keys = {}
+    for file_name in file_names:
+        try:
+            keys[file_name] = cache.key(file_name)
+        except OSError:
+            pass
+    misses = collections.deque(file_name for file_name in file_names if keys.get(file_name) not in cache)
+    analyzed = __analyze(list(misses), args, analyzers, jobs)
+    for file_name in file_names:
+        key = keys.get(file_name)
+        results = None
+        if key in cache:
+            results = cache.get(key)
+        if results is None:
+            if misses and misses[0] == file_name:
+                misses.popleft()
+                results = next(analyzed)[1]
+            else:
+                # Evicted since the lookup, to make room for new results
+                results = analyze_file(file_name, args, analyzers)
+            if key is not None:
+                cache.put(key, results)
+        yield file_name, results
+    # Let the pool (if any) shut down normally
+    for item in analyzed:
+        pass
+
+def __analyze(file_names, args, analyzers, jobs):
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    if jobs <= 1 or len(file_names) <= 1:
+        for file_name in file_names:
+            yield file_name, analyze_file(file_name, args, analyzers)
+        return
+
+    # Small chunks keep results flowing back in order; larger ones cut IPC
+    # overhead when there are many small files
+    chunksize = max(1, min(64, len(file_names) // (jobs * 4)))
+    pool = multiprocessing.Pool(jobs, __init_worker, (args,))
+    try:
+        for item in pool.imap(__work, file_names, chunksize):
+            yield item
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+def check(file_names, args, jobs=1):
+    """
+    Validates files, yielding results in the order of file_names.
+
+    :param file_names: (list) paths of JSON files to read
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param jobs: (int) number of worker processes; 0 means one per CPU
+
+    :returns: generator of tuples (file_name, error), error being None for
+        valid files (see modules.loader.check)
+    """
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    if jobs <= 1 or len(file_names) <= 1:
+        for file_name in file_names:
+            yield file_name, modules.loader.check(file_name, args)
+        return
+
+    # Files are checked much faster than analyzed, so larger chunks pay off
+    chunksize = max(1, min(256, len(file_names) // (jobs * 4)))
+    pool = multiprocessing.Pool(jobs, __init_check_worker, (args,))
+    try:
+        for item in pool.imap(__work_check, file_names, chunksize):
+            yield item
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Registry of analyzer modules.
+#
+# The registry is built once at startup from modules.analyzers.__all__ and
+# holds direct references to each module's functions. From the __alias dicts
+# of all modules it builds a single index mapping every LIS item name to its
+# standard name and owning analyzer; the loader uses it to normalize item
+# names once per timepoint. The dispatch plan lists (standard item name,
+# analyze_series) pairs in dispatch order, so each analyzer is called once
+# per series of a patient it handles, and only for series present in the
+# patient's timeline. Modules that only define a rule table (RULES) are
+# evaluated by modules.rules, and modules that only define a per-timepoint
+# analyze() are wrapped with modules.series.legacy_adapter(). The rule tables
+# and DERIVED quantities of all modules make up a single modules.derived.Graph.
+
+import hashlib
+import importlib
+
+import modules.analyzers
+import modules.derived
+import modules.episodes
+import modules.rules
+import modules.series
+
+class Registry(object):
+    """
+    Holds the loaded analyzer modules and dispatches series to them.
+    """
+    def __init__(self, analyzer_modules):
+        """
+        :param analyzer_modules: (list) analyzer modules, in dispatch order
+        """
+        self.modules = list(analyzer_modules)
+        self.names = [m.__name__.rsplit('.', 1)[-1] for m in self.modules]
+        # LIS item name -> (standard item name, index of owning analyzer)
+        self.index = {}
+        for i, m in enumerate(self.modules):
+            alias = getattr(m, '__alias', {})
+            for item, name in list(alias.items()) + [(name, name) for name in alias.values()]:
+                if self.index.get(item, (name, i)) != (name, i):
+                    raise Exception("Item name {} claimed by more than one analyzer".format(item))
+                self.index[item] = (name, i)
+        # Digest of the item names known, for data saved after normalization
+        self.index_digest = hashlib.sha256(repr(sorted((item, name) for item, (name, i) in self.index.items())).encode()).hexdigest()
+        # Rule tables by item name, and derived quantities, of all modules
+        tables = {}
+        nodes = {}
+        for m in self.modules:
+            items = dict(getattr(m, 'INPUTS', {}))
+            if hasattr(m, 'RULES'):
+                for name in set(getattr(m, '__alias', {}).values()):
+                    items[name] = getattr(m, 'RULES')
+            for name in list(items) + list(getattr(m, 'DERIVED', {})):
+                if name in tables or name in nodes:
+                    raise Exception("Quantity {} defined by more than one analyzer".format(name))
+            tables.update(items)
+            nodes.update(getattr(m, 'DERIVED', {}))
+        self.graph = modules.derived.Graph(tables, nodes)
+        # (standard item name, analyze_series) in dispatch order
+        self.plan = []
+        for m in self.modules:
+            if hasattr(m, 'analyze_series'):
+                analyze_series = getattr(m, 'analyze_series')
+            elif hasattr(m, 'RULES'):
+                analyze_series = modules.rules.analyzer(getattr(m, 'RULES'))
+            else:
+                analyze_series = modules.series.legacy_adapter(getattr(m, 'analyze'))
+            for name in sorted(set(getattr(m, '__alias', {}).values())):
+                self.plan.append((name, analyze_series))
+
+    def normalize(self, entries):
+        """
+        Returns a copy of the entries of a timepoint, with LIS item names
+        replaced by their standard names. An item already present under its
+        standard name takes precedence over its aliases; unknown items are
+        kept as is.
+
+        :param entries: (dict) item name -> entry, as found at a timepoint
+
+        :returns: dict
+        """
+        normalized = {}
+        for item, entry in entries.items():
+            name = self.index[item][0] if item in self.index else item
+            if name != item and name in entries:
+                continue
+            normalized[name] = entry
+        return normalized
+
+    def dispatch(self, ctx, timeline, args):
+        """
+        Calls each analyzer once per series it handles in timeline.
+
+        :param ctx: (PatientContext) context of the patient being analyzed
+        :param timeline: (Timeline) series of the patient, by standard item name
+        :param args: (dict) switches provided to lisanalyze.py via argparse
+        """
+        for name, analyze_series in self.plan:
+            if name in timeline:
+                analyze_series(ctx, timeline[name], timeline, args)
+        if ctx.episodes:
+            modules.episodes.close_batch(ctx, timeline)
+
+def build(names=None):
+    """
+    Imports analyzer modules and returns a Registry holding them.
+
+    :param names: (list) module names in modules.analyzers (optional; defaults
+        to modules.analyzers.__all__)
+
+    :returns: Registry
+    """
+    if names is None:
+        names = modules.analyzers.__all__
+    return Registry([importlib.import_module('modules.analyzers.' + name) for name in names])
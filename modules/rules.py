@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Rule tables and their evaluator.
+#
+# Most analyzers only compare values against fixed limits. Such a module
+# defines a RULES dict instead of analysis code:
+#
+#     RULES = {
+#         "unit": "mmol/l",           # unit used for built-in limits
+#         "context": None,            # pint context and molecular weight
+#         "mw": None,                 #   for unit conversion (optional)
+#         "scale": 1,                 # extra conversion factor (optional)
+#         "eq_to_mol": False,         # read "mEq" as "mmol" (optional)
+#         "normal": (3.5, 5),         # built-in (low, high) normal limits
+#         "panic": (3, 6),            # (low, high) panic limits
+#         "extra": [(">", 1000, "...")],  # other (op, limit, text[, severity]) rules
+#         "text": {"high": "...", "low": "...", "panic_high": "...", "panic_low": "..."},
+#     }
+#
+# Limits may be None, and a rule is only checked if it has a text. Texts are
+# formatted with {value}, {limit} and {unit}. For "high" and "low", limits
+# provided with the results (ref_high and ref_low) take precedence over the
+# built-in ones and are compared with the value as reported. Extra ops are
+# ">", "<" and "in" (limit is a (low, high) pair; low < value <= high).
+#
+# Events are recorded as modules.events.Event records, with the text of the
+# rule as template: "high" and "low" are ABNORMAL, panics PANIC, and extra
+# rules ABNORMAL unless they give a severity. Their codes are the item name
+# and the rule ("K.panic_high", "AST.>1000").
+#
+# evaluate() converts a whole series and checks each rule over all its
+# timepoints in one vectorized NumPy comparison.
+
+import sys
+
+import numpy
+
+import modules.events as events
+import modules.units as units
+
+def analyzer(table):
+    """
+    Returns an analyze_series() function evaluating a rule table.
+
+    :param table: (dict) rule table, as described above
+
+    :returns: callable (ctx, series, timeline, args)
+    """
+    def analyze_series(ctx, series, timeline, args):
+        values = None
+        if ctx.quantities is not None:
+            values = ctx.quantities.get(series.name)
+        evaluate(ctx, series, table, args, values)
+    return analyze_series
+
+def read_units(series, table):
+    """
+    Returns the units of a series as a rule table reads them ("mEq" as
+    "mmol" with eq_to_mol), leaving the series as it is, as other analyzers
+    may read the same series.
+
+    :param series: (Series) series whose units are wanted
+    :param table: (dict) rule table
+
+    :returns: list of str
+    """
+    if table.get("eq_to_mol"):
+        return [series_unit.lower().replace("eq", "mol") for series_unit in series.units]
+    return series.units
+
+def convert(series, table, args):
+    """
+    Returns the values of a series in the unit of a rule table.
+
+    :param series: (Series) values to convert
+    :param table: (dict) rule table
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+
+    :returns: numpy.ndarray of float64
+    """
+    unit = table["unit"]
+    values = numpy.frombuffer(series.values, dtype=numpy.float64)
+    if args.warn:
+        for time, series_unit in zip(series.times, series.units):
+            if series_unit != unit:
+                print("WARNING: unit mismatch in entry for {}".format(time), file=sys.stderr)
+    if not args.convert:
+        return values
+
+    series_units = read_units(series, table)
+    # One lookup per distinct unit, however long the series
+    factors = {}
+    for series_unit in series_units:
+        if series_unit not in factors:
+            factors[series_unit] = units.get_factor(series_unit, unit, table.get("context"), table.get("mw")) * table.get("scale", 1)
+    return values * numpy.array([factors[series_unit] for series_unit in series_units])
+
+def align(series, other, other_values):
+    """
+    Returns the values of another series at the times of series.
+
+    :param series: (Series) series whose times are wanted
+    :param other: (Series) series to take values from
+    :param other_values: (numpy.ndarray) values of other (e.g. from convert())
+
+    :returns: numpy.ndarray of float64, NaN where other has no value
+    """
+    epochs = numpy.frombuffer(series.epochs, dtype=numpy.int64)
+    other_epochs = numpy.frombuffer(other.epochs, dtype=numpy.int64)
+    aligned = numpy.full(len(epochs), numpy.nan)
+    if len(other_epochs) == 0:
+        return aligned
+    index = numpy.minimum(numpy.searchsorted(other_epochs, epochs), len(other_epochs) - 1)
+    found = other_epochs[index] == epochs
+    aligned[found] = other_values[index[found]]
+    return aligned
+
+def evaluate(ctx, series, table, args, values=None):
+    """
+    Checks all timepoints of a series against a rule table and records events
+    in ctx.
+
+    :param ctx: (PatientContext) context of the patient being analyzed
+    :param series: (Series) values to check
+    :param table: (dict) rule table
+    :param args: (dict) switches provided to lisanalyze.py via argparse
+    :param values: (numpy.ndarray) values in the unit of the table, if already
+        converted or corrected (optional)
+
+    :returns: False
+    """
+    if values is None:
+        values = convert(series, table, args)
+    unit = table["unit"]
+    text = table["text"]
+    normal_low, normal_high = table.get("normal", (None, None))
+    panic_low, panic_high = table.get("panic", (None, None))
+    # Values as reported, for comparison with provided reference values
+    reported = numpy.frombuffer(series.values, dtype=numpy.float64)
+    # Python floats, so that events show values as the scalar code did
+    value_list = values.tolist()
+
+    # Out-of-normal-range warning; provided values take precedence. Both kinds
+    # of limits are checked in one mask, so that events of a code are recorded
+    # in time order (as modules.episodes expects)
+    for side, ref, limit in (("high", series.ref_high, normal_high), ("low", series.ref_low, normal_low)):
+        if side not in text:
+            continue
+        code = series.name + "." + side
+        ref = numpy.frombuffer(ref, dtype=numpy.float64)
+        provided = ~numpy.isnan(ref)
+        if side == "high":
+            out_of_range = provided & (reported > ref)
+        else:
+            out_of_range = provided & (reported < ref)
+        if args.warn:
+            for _ in range(numpy.count_nonzero(~provided)):
+                print("WARNING: {} reference value not provided; falling back to built-in value".format("higher" if side == "high" else "lower"), file=sys.stderr)
+        if limit is not None:
+            if side == "high":
+                out_of_range |= ~provided & (values > limit)
+            else:
+                out_of_range |= ~provided & (values < limit)
+        provided_list = provided.tolist()
+        for i in numpy.flatnonzero(out_of_range).tolist():
+            if provided_list[i]:
+                entry = series.entries[i]
+                ctx.add_event(series.times[i], events.Event(code, series.name, events.ABNORMAL, text[side], entry["lab_value"], entry["ref_" + side], series.units[i]))
+            else:
+                ctx.add_event(series.times[i], events.Event(code, series.name, events.ABNORMAL, text[side], value_list[i], limit, unit))
+
+    # Panic values and other fixed thresholds
+    rules = []
+    if panic_high is not None and "panic_high" in text:
+        rules.append((series.name + ".panic_high", ">", panic_high, text["panic_high"], events.PANIC))
+    if panic_low is not None and "panic_low" in text:
+        rules.append((series.name + ".panic_low", "<", panic_low, text["panic_low"], events.PANIC))
+    for rule in table.get("extra", []):
+        op, limit, rule_text = rule[:3]
+        severity = rule[3] if len(rule) > 3 else events.ABNORMAL
+        rules.append(("{}.{}{}".format(series.name, op, limit), op, limit, rule_text, severity))
+    for code, op, limit, rule_text, severity in rules:
+        if op == ">":
+            matched = values > limit
+        elif op == "<":
+            matched = values < limit
+        elif op == "in":
+            matched = (values > limit[0]) & (values <= limit[1])
+        else:
+            raise Exception("Unknown rule operator {}".format(op))
+        for i in numpy.flatnonzero(matched).tolist():
+            ctx.add_event(series.times[i], events.Event(code, series.name, severity, rule_text, value_list[i], limit, unit))
+    return False
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Columnar representation of a patient's lab history.
+#
+# Each file is converted once, after loading, into a Timeline: one Series per
+# standard item name, holding that item's timepoints in time order as
+# parallel columns (epoch timestamps as array('q'), values and reference
+# limits as array('d'), NaN where missing or non-numeric). Analyzers that
+# define analyze_series(ctx, series, timeline, args) get a whole column per
+# call instead of being called once per timepoint; analyzers that only define
+# analyze(ctx, lis_struct, time, args) are run through legacy_adapter().
+#
+# Values and reference limits are parsed once, when a series is built, by
+# parse_value(): besides the number, each timepoint gets a qualifier (for
+# values reported as "<0.1" or ">100") and flags telling censored and
+# non-numeric values apart. Analyzers read these columns instead of parsing
+# the reported strings themselves. Lab values repeat a lot (e.g. "4.0"), so
+# parsed strings are memoized.
+
+import datetime
+import enum
+import math
+from array import array
+
+__epoch = datetime.datetime(1970, 1, 1)
+__nan = float('nan')
+# Parsed strings, and the number of them kept at most
+__parsed = {}
+__parsed_max = 65536
+
+class Qualifier(enum.IntEnum):
+    """
+    Qualifier of a reported value.
+    """
+    EXACT = 0
+    # "<0.1" or "<=0.1": below the measurable range
+    LESS = 1
+    # ">100" or ">=100": above the measurable range
+    GREATER = 2
+
+# Flags of a reported value
+CENSORED = 1
+NON_NUMERIC = 2
+
+def to_epoch(time):
+    """
+    Converts an ISO8601-formatted time (as found in LIS data) to seconds since
+    1970-01-01T00:00, in the same (local) time zone as the data.
+
+    :param time: (str) time as contained in JSON file
+
+    :returns: int, or None if time is not ISO8601-formatted
+    """
+    try:
+        return int((datetime.datetime.strptime(time[:16], "%Y-%m-%dT%H:%M") - __epoch).total_seconds())
+    except ValueError:
+        return None
+
+def to_float(value):
+    """
+    Returns value as a float, or NaN if it is missing or not a plain number
+    (e.g. "<0.1").
+    """
+    number, qualifier, flags = parse_value(value)
+    if flags:
+        return __nan
+    return number
+
+def parse_value(value):
+    """
+    Parses a value or reference limit as reported.
+
+    :param value: (str) value as contained in JSON file, or None
+
+    :returns: tuple (number, qualifier, flags): number is the bound of a
+        censored value (e.g. 0.1 for "<0.1") and NaN for non-numeric values;
+        qualifier is a Qualifier; flags is 0, CENSORED or NON_NUMERIC
+    """
+    try:
+        return __parsed[value]
+    except KeyError:
+        pass
+    except TypeError:
+        # Not hashable; not a value either
+        return __nan, Qualifier.EXACT, NON_NUMERIC
+
+    qualifier = Qualifier.EXACT
+    text = value
+    if isinstance(value, str):
+        text = value.strip()
+        if text[:1] == "<":
+            qualifier = Qualifier.LESS
+        elif text[:1] == ">":
+            qualifier = Qualifier.GREATER
+        if qualifier != Qualifier.EXACT:
+            text = text[1:].lstrip("=").strip()
+    try:
+        number = float(text)
+    except (TypeError, ValueError):
+        parsed = (__nan, Qualifier.EXACT, NON_NUMERIC)
+    else:
+        if number != number:
+            # "nan" is not a value
+            parsed = (__nan, Qualifier.EXACT, NON_NUMERIC)
+        else:
+            parsed = (number, qualifier, CENSORED if qualifier != Qualifier.EXACT else 0)
+
+    if len(__parsed) >= __parsed_max:
+        __parsed.clear()
+    __parsed[value] = parsed
+    return parsed
+
+def to_limit(value):
+    """
+    Returns a reference limit as a float, or NaN if it is missing or not a
+    number. A qualified limit (e.g. "<4.0") is taken as its bound.
+    """
+    return parse_value(value)[0]
+
+class Series(object):
+    """
+    Timepoints of one item for one patient, in time order.
+    """
+    __slots__ = ("name", "times", "epochs", "values", "qualifiers", "flags", "units", "ref_low", "ref_high", "entries")
+
+    def __init__(self, name):
+        """
+        :param name: (str) standard item name (e.g. "K")
+        """
+        self.name = name
+        # Times as contained in JSON file; event times are reported with these
+        self.times = []
+        self.epochs = array('q')
+        # Plain numbers; NaN for censored and non-numeric values, whose
+        # qualifier and flags tell them apart
+        self.values = array('d')
+        self.qualifiers = array('b')
+        self.flags = array('b')
+        self.units = []
+        self.ref_low = array('d')
+        self.ref_high = array('d')
+        # Original entries, for the raw strings and legacy analyzers
+        self.entries = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, epoch, entry):
+        """
+        Appends a timepoint; timepoints must be appended in time order.
+
+        :param time: (str) time as contained in JSON file
+        :param epoch: (int) time as returned by to_epoch()
+        :param entry: (dict) entry of this item at time
+        """
+        self.times.append(time)
+        self.epochs.append(epoch)
+        number, qualifier, flags = parse_value(entry.get("lab_value"))
+        self.values.append(math.nan if flags else number)
+        self.qualifiers.append(qualifier)
+        self.flags.append(flags)
+        self.units.append(entry.get("unit"))
+        self.ref_low.append(to_limit(entry.get("ref_low")))
+        self.ref_high.append(to_limit(entry.get("ref_high")))
+        self.entries.append(entry)
+
+class Timeline(dict):
+    """
+    All series of one patient, keyed by standard item name.
+    """
+    __slots__ = ("__struct",)
+
+    def __init__(self):
+        dict.__init__(self)
+        self.__struct = None
+
+    def as_struct(self):
+        """
+        Returns the timeline in the {time -> {item -> entry}} form expected by
+        legacy analyze() functions; built on first call.
+
+        :returns: dict
+        """
+        if self.__struct is None:
+            self.__struct = {}
+            for name, series in self.items():
+                for time, entry in zip(series.times, series.entries):
+                    if time not in self.__struct:
+                        self.__struct[time] = {}
+                    self.__struct[time][name] = entry
+        return self.__struct
+
+def build_timeline(lis_struct):
+    """
+    Converts loaded (and normalized) LIS data into a Timeline.
+
+    :param lis_struct: (dict) {time -> {item -> entry}}
+
+    :returns: Timeline
+    """
+    timeline = Timeline()
+    for i, time in enumerate(sorted(lis_struct.keys())):
+        epoch = to_epoch(time)
+        if epoch is None:
+            # Times not in ISO8601 format (--compat): keep their sort order
+            epoch = i
+        for name, entry in lis_struct[time].items():
+            if name not in timeline:
+                timeline[name] = Series(name)
+            timeline[name].append(time, epoch, entry)
+    return timeline
+
+def legacy_adapter(analyze):
+    """
+    Wraps an analyze(ctx, lis_struct, time, args) function so it can be
+    called like analyze_series().
+
+    :param analyze: (callable) legacy per-timepoint analyze() function
+
+    :returns: callable (ctx, series, timeline, args)
+    """
+    def analyze_series(ctx, series, timeline, args):
+        lis_struct = timeline.as_struct()
+        for time in series.times:
+            analyze(ctx, lis_struct, time, args)
+    return analyze_series
@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Memory-mapped columnar store of lab histories (--input-format store).
+#
+# A store holds the data of many patients, already validated and normalized,
+# as the columns of modules.series: for each patient and item, epoch
+# timestamps (int64), values and reference limits (float64, NaN when missing),
+# as indices into a table of interned strings, the times, units and values as
+# reported, and the qualifiers and flags of the values (int8). It is built
+# from data files with lisstore.py.
+#
+# File layout (header little-endian, columns in native byte order):
+#
+#     magic        8 bytes, b"LISSTOR1"
+#     index        uint64 offset and uint64 length of the index
+#     columns      for each series of n timepoints, at an 8-byte aligned
+#                  offset: epochs, values, ref_low, ref_high (n x 8 bytes
+#                  each), then time, unit, value, ref_low and ref_high string
+#                  indices (n x 4 bytes each; -1 where absent), then
+#                  qualifiers and flags (n x 1 byte each)
+#     index        JSON: version, digest of the item names the data was
+#                  normalized with, string table, and for each patient ID
+#                  its series as [item string index, n, offset]
+#
+# Store opens the file with mmap, so series columns are read in place, without
+# copying or parsing, and processes reading the same store (e.g. with --jobs)
+# share one copy of it in the page cache. Looking up a patient takes a dict
+# lookup; times, units and entries are only turned into Python objects when
+# an analyzer reads them.
+
+import io
+import json
+import mmap
+import os
+import struct
+from array import array
+
+import modules.series
+
+VERSION = 2
+MAGIC = b"LISSTOR1"
+HEADER = struct.Struct("<8sQQ")
+
+class StringColumn(object):
+    """
+    Sequence of strings given by their indices in the string table.
+    """
+    __slots__ = ("strings", "ids")
+
+    def __init__(self, strings, ids):
+        self.strings = strings
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.strings[self.ids[i]]
+
+    def __iter__(self):
+        strings = self.strings
+        return (strings[i] for i in self.ids)
+
+class EntryColumn(object):
+    """
+    Sequence of entries ({"lab_value": ..., "unit": ...}), built on access.
+    """
+    __slots__ = ("strings", "values", "units", "ref_low", "ref_high")
+
+    def __init__(self, strings, values, units, ref_low, ref_high):
+        self.strings = strings
+        self.values = values
+        self.units = units
+        self.ref_low = ref_low
+        self.ref_high = ref_high
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        entry = {"lab_value": self.strings[self.values[i]], "unit": self.strings[self.units[i]]}
+        if self.ref_low[i] >= 0:
+            entry["ref_low"] = self.strings[self.ref_low[i]]
+        if self.ref_high[i] >= 0:
+            entry["ref_high"] = self.strings[self.ref_high[i]]
+        return entry
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class Store(object):
+    """
+    Read-only view of a store file.
+    """
+    __slots__ = ("map", "view", "strings", "patients")
+
+    def __init__(self, path, analyzers=None):
+        """
+        :param path: (str) path of store file
+        :param analyzers: (Registry) analyzer registry; if given, the store
+            must have been built with the same item names (optional)
+        """
+        with io.open(path, 'rb') as store_file:
+            try:
+                self.map = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, index_offset, index_length = HEADER.unpack_from(self.map, 0)
+            except (ValueError, struct.error):
+                magic = None
+        if magic != MAGIC:
+            raise Exception("Not a store file")
+        self.view = memoryview(self.map)
+        index = json.loads(bytes(self.view[index_offset:index_offset + index_length]).decode())
+        if index["version"] != VERSION:
+            raise Exception("Store file of unsupported version; rebuild it with lisstore.py")
+        if analyzers is not None and index["items"] != analyzers.index_digest:
+            raise Exception("Store built with other item names; rebuild it with lisstore.py")
+        self.strings = index["strings"]
+        self.patients = dict((patient_id, series) for patient_id, series in index["patients"])
+
+    def patient_ids(self):
+        """
+        Returns the IDs of the patients in the store, in the order they were
+        added.
+
+        :returns: list of str
+        """
+        return list(self.patients)
+
+    def timeline(self, patient_id):
+        """
+        Returns the data of a patient, with columns read in place.
+
+        :param patient_id: (str) patient ID
+
+        :returns: Timeline
+        """
+        timeline = modules.series.Timeline()
+        for name_id, n, offset in self.patients[patient_id]:
+            series = modules.series.Series(self.strings[name_id])
+            columns = []
+            for typecode, size in (("q", 8), ("d", 8), ("d", 8), ("d", 8), ("i", 4), ("i", 4), ("i", 4), ("i", 4), ("i", 4), ("b", 1), ("b", 1)):
+                columns.append(self.view[offset:offset + n * size].cast(typecode))
+                offset += n * size
+            series.epochs, series.values, series.ref_low, series.ref_high, times, units, values, ref_low, ref_high, series.qualifiers, series.flags = columns
+            series.times = StringColumn(self.strings, times)
+            series.units = StringColumn(self.strings, units)
+            series.entries = EntryColumn(self.strings, values, units, ref_low, ref_high)
+            timeline[series.name] = series
+        return timeline
+
+def write(path, patients, analyzers):
+    """
+    Writes a store file.
+
+    :param path: (str) path of store file to write
+    :param patients: (iterable) tuples (patient_id, {time -> {item -> entry}}),
+        validated and normalized (see modules.loader)
+    :param analyzers: (Registry) analyzer registry the data was normalized with
+    """
+    strings = []
+    string_ids = {}
+    def intern(string):
+        if string is None:
+            return -1
+        if string not in string_ids:
+            string_ids[string] = len(strings)
+            strings.append(string)
+        return string_ids[string]
+
+    index = []
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with io.open(temp_path, 'wb') as store_file:
+        store_file.write(HEADER.pack(MAGIC, 0, 0))
+        for patient_id, lis_struct in patients:
+            patient_series = []
+            for name, series in sorted(modules.series.build_timeline(lis_struct).items()):
+                n = len(series)
+                patient_series.append([intern(name), n, store_file.tell()])
+                columns = [series.epochs, series.values, series.ref_low, series.ref_high,
+                    array("i", [intern(time) for time in series.times]),
+                    array("i", [intern(unit) for unit in series.units]),
+                    array("i", [intern(entry.get("lab_value")) for entry in series.entries]),
+                    array("i", [intern(entry.get("ref_low")) for entry in series.entries]),
+                    array("i", [intern(entry.get("ref_high")) for entry in series.entries]),
+                    series.qualifiers, series.flags]
+                for column in columns:
+                    store_file.write(column.tobytes())
+                # Keep the next series 8-byte aligned
+                store_file.write(b"\0" * (-store_file.tell() % 8))
+            index.append([patient_id, patient_series])
+        index_offset = store_file.tell()
+        index_bytes = json.dumps({"version": VERSION, "items": analyzers.index_digest, "strings": strings, "patients": index}).encode()
+        store_file.write(index_bytes)
+        store_file.seek(0)
+        store_file.write(HEADER.pack(MAGIC, index_offset, len(index_bytes)))
+    os.replace(temp_path, path)
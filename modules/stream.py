@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Streaming reader for JSON-formatted LIS data files (--stream).
+#
+# json.load() builds the whole {time -> {item -> entry}} tree of a file
+# before anything can be analyzed. timepoints() instead reads the file in
+# chunks and yields its top-level (time, entries) pairs one at a time, so only
+# the current chunk and timepoint are held in memory, however long the
+# patient's history. items() does the same for any file holding a JSON
+# object, e.g. the patients of a bundle (modules.bundle).
+#
+# An object or array value (e.g. a patient of a bundle) may span many chunks.
+# Its end is found first, by scanning each chunk once for strings and
+# brackets (keeping the depth, and whether a string or escape goes on into
+# the next chunk), and the value is then decoded once, from the chunks joined,
+# so reading it takes time linear in its size.
+
+import json
+import re
+
+class __Reader(object):
+    """
+    Buffered view of a text file, from which JSON values are decoded.
+    """
+    __slots__ = ("lis_file", "chunk_size", "buffer", "pos", "eof")
+    __decoder = json.JSONDecoder()
+    __whitespace = " \t\n\r"
+    # A string (group 1 matched if it is closed), or a bracket
+    __token = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\]]', re.S)
+    # The rest of a string begun in an earlier chunk
+    __rest = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*(")?', re.S)
+    # Characters a number may be made of
+    __number = re.compile(r'[-+.0-9eE]*')
+
+    def __init__(self, lis_file, chunk_size):
+        self.lis_file = lis_file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Reads another chunk; returns False at end of file.
+        """
+        if self.eof:
+            return False
+        chunk = self.lis_file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character ("" at end of file).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.__whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        """
+        Consumes the next character, which must be one of chars.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise Exception("Invalid JSON file")
+        self.pos += 1
+        return char
+
+    def scan(self, text, i, state):
+        """
+        Scans text from i for the end of an object or array.
+
+        :param text: (str) part of the value
+        :param i: (int) index to scan text from
+        :param state: (tuple) (depth, in string, after backslash), as left by
+            the scan of the previous part
+
+        :returns: tuple (index after the value's end or None, state)
+        """
+        depth, in_string, escape = state
+        n = len(text)
+        if in_string:
+            match = self.__rest.match(text, i + 1 if escape else i)
+            i = match.end()
+            if match.group(1) is None:
+                # A backslash left at the end escapes the next part's start
+                return None, (depth, True, i < n)
+        while True:
+            match = self.__token.search(text, i)
+            if match is None:
+                return None, (depth, False, False)
+            i = match.end()
+            char = text[match.start()]
+            if char == '"':
+                if match.group(1) is None:
+                    return None, (depth, True, i < n)
+            elif char in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i, (depth, False, False)
+
+    def compound(self):
+        """
+        Decodes the next object or array, reading more of the file until its
+        end is found.
+        """
+        parts = [self.buffer[self.pos:]]
+        end, state = self.scan(parts[0], 0, (0, False, False))
+        while end is None:
+            chunk = self.lis_file.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                raise Exception("Invalid JSON file")
+            parts.append(chunk)
+            end, state = self.scan(chunk, 0, state)
+        self.buffer = parts[-1][end:]
+        self.pos = 0
+        parts[-1] = parts[-1][:end]
+        text = "".join(parts)
+        try:
+            value, end = self.__decoder.raw_decode(text)
+        except ValueError:
+            raise Exception("Invalid JSON file")
+        if end != len(text):
+            raise Exception("Invalid JSON file")
+        return value
+
+    def value(self):
+        """
+        Decodes the next JSON value, reading more of the file as needed.
+        """
+        if self.peek() in ("{", "["):
+            return self.compound()
+        # A number at the end of the buffer may go on in the next chunk (a part
+        # of it, e.g. "1." of "1.5", would be decoded as another number)
+        while self.__number.match(self.buffer, self.pos).end() == len(self.buffer) and self.fill():
+            pass
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # Incomplete value; anything else is still an error at EOF
+                if self.fill():
+                    continue
+                raise Exception("Invalid JSON file")
+            self.pos = end
+            return value
+
+def timepoints(lis_file, chunk_size=65536):
+    """
+    Yields the top-level (time, entries) pairs of a JSON-formatted LIS data
+    file, in file order, as they are read.
+
+    :param lis_file: (file) data file opened in text mode
+    :param chunk_size: (int) number of characters read at a time
+
+    :returns: generator of tuples (str, value)
+    """
+    return items(lis_file, chunk_size)
+
+def items(json_file, chunk_size=65536):
+    """
+    Yields the top-level (key, value) pairs of a file holding a JSON object,
+    in file order, as they are read.
+
+    :param json_file: (file) file opened in text mode
+    :param chunk_size: (int) number of characters read at a time
+
+    :returns: generator of tuples (str, value)
+    """
+    reader = __Reader(json_file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            time = reader.value()
+            if not isinstance(time, str):
+                raise Exception("Invalid JSON file")
+            reader.expect(":")
+            yield time, reader.value()
+            if reader.expect(",}") == "}":
+                break
+    if reader.peek():
+        raise Exception("Invalid JSON file")
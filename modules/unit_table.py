@@ -0,0 +1,330 @@
+#-*- coding: utf-8 -*-
+
+# Generated by lisunittable.py with pint 0.25.3; do not edit by hand.
+# Maps (unit, target unit, context, mw) to conversion factors; see modules.units.
+
+FACTORS = {
+    # AFP, CEA, PRL
+    ('g/l', 'ng/ml', None, None): 999999.9999999999,
+    ('g/L', 'ng/ml', None, None): 999999.9999999999,
+    ('g/dl', 'ng/ml', None, None): 9999999.999999998,
+    ('g/dL', 'ng/ml', None, None): 9999999.999999998,
+    ('mg/l', 'ng/ml', None, None): 999.9999999999999,
+    ('mg/L', 'ng/ml', None, None): 999.9999999999999,
+    ('mg/dl', 'ng/ml', None, None): 9999.999999999998,
+    ('mg/dL', 'ng/ml', None, None): 9999.999999999998,
+    ('mg/ml', 'ng/ml', None, None): 999999.9999999999,
+    ('ug/l', 'ng/ml', None, None): 0.9999999999999999,
+    ('ug/L', 'ng/ml', None, None): 0.9999999999999999,
+    ('ug/dl', 'ng/ml', None, None): 9.999999999999998,
+    ('ug/dL', 'ng/ml', None, None): 9.999999999999998,
+    ('ug/ml', 'ng/ml', None, None): 999.9999999999999,
+    ('ug/mL', 'ng/ml', None, None): 999.9999999999999,
+    ('ng/l', 'ng/ml', None, None): 0.001,
+    ('ng/L', 'ng/ml', None, None): 0.001,
+    ('ng/dl', 'ng/ml', None, None): 0.01,
+    ('ng/dL', 'ng/ml', None, None): 0.01,
+    ('ng/ml', 'ng/ml', None, None): 1.0,
+    ('ng/mL', 'ng/ml', None, None): 1.0,
+    ('pg/ml', 'ng/ml', None, None): 0.0009999999999999998,
+    ('pg/mL', 'ng/ml', None, None): 0.0009999999999999998,
+    # albumin
+    ('g/l', 'g/dl', None, None): 0.1,
+    ('g/L', 'g/dl', None, None): 0.1,
+    ('g/dl', 'g/dl', None, None): 1.0,
+    ('g/dL', 'g/dl', None, None): 1.0,
+    ('mg/l', 'g/dl', None, None): 0.0001,
+    ('mg/L', 'g/dl', None, None): 0.0001,
+    ('mg/dl', 'g/dl', None, None): 0.001,
+    ('mg/dL', 'g/dl', None, None): 0.001,
+    ('mg/ml', 'g/dl', None, None): 0.1,
+    ('ug/l', 'g/dl', None, None): 1e-07,
+    ('ug/L', 'g/dl', None, None): 1e-07,
+    ('ug/dl', 'g/dl', None, None): 1e-06,
+    ('ug/dL', 'g/dl', None, None): 1e-06,
+    ('ug/ml', 'g/dl', None, None): 9.999999999999999e-05,
+    ('ug/mL', 'g/dl', None, None): 9.999999999999999e-05,
+    ('ng/l', 'g/dl', None, None): 1.0000000000000002e-10,
+    ('ng/L', 'g/dl', None, None): 1.0000000000000002e-10,
+    ('ng/dl', 'g/dl', None, None): 1e-09,
+    ('ng/dL', 'g/dl', None, None): 1e-09,
+    ('ng/ml', 'g/dl', None, None): 1.0000000000000002e-07,
+    ('ng/mL', 'g/dl', None, None): 1.0000000000000002e-07,
+    ('pg/ml', 'g/dl', None, None): 1e-10,
+    ('pg/mL', 'g/dl', None, None): 1e-10,
+    # ALT, AST
+    ('U/l', 'U/l', None, None): 1.0,
+    ('U/L', 'U/l', None, None): 1.0,
+    ('U/ml', 'U/l', None, None): 1000.0,
+    ('U/mL', 'U/l', None, None): 1000.0,
+    ('mU/ml', 'U/l', None, None): 1.0,
+    ('mU/mL', 'U/l', None, None): 1.0,
+    ('kat/l', 'U/l', None, None): 60350030.17501509,
+    ('ukat/l', 'U/l', None, None): 60.35003017501509,
+    ('ukat/L', 'U/l', None, None): 60.35003017501509,
+    # BUN
+    ('mmol/l', 'mg/dl', 'chemistry', 60.06): 6.006,
+    ('mmol/L', 'mg/dl', 'chemistry', 60.06): 6.006,
+    ('umol/l', 'mg/dl', 'chemistry', 60.06): 0.006006,
+    ('umol/L', 'mg/dl', 'chemistry', 60.06): 0.006006,
+    ('nmol/l', 'mg/dl', 'chemistry', 60.06): 6.0060000000000014e-06,
+    ('nmol/L', 'mg/dl', 'chemistry', 60.06): 6.0060000000000014e-06,
+    ('pmol/l', 'mg/dl', 'chemistry', 60.06): 6.006e-09,
+    ('pmol/L', 'mg/dl', 'chemistry', 60.06): 6.006e-09,
+    ('mol/l', 'mg/dl', 'chemistry', 60.06): 6006.0,
+    ('g/l', 'mg/dl', 'chemistry', 60.06): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 60.06): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 60.06): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 60.06): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 60.06): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 60.06): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 60.06): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 60.06): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 60.06): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 60.06): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 60.06): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 60.06): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 60.06): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 60.06): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 60.06): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 60.06): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 60.06): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 60.06): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 60.06): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 60.06): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 60.06): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 60.06): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 60.06): 1.0000000000000001e-07,
+    # C-peptide
+    ('mmol/l', 'ng/ml', 'chemistry', 3020.29): 3020289.9999999995,
+    ('mmol/L', 'ng/ml', 'chemistry', 3020.29): 3020289.9999999995,
+    ('umol/l', 'ng/ml', 'chemistry', 3020.29): 3020.2899999999995,
+    ('umol/L', 'ng/ml', 'chemistry', 3020.29): 3020.2899999999995,
+    ('nmol/l', 'ng/ml', 'chemistry', 3020.29): 3.02029,
+    ('nmol/L', 'ng/ml', 'chemistry', 3020.29): 3.02029,
+    ('pmol/l', 'ng/ml', 'chemistry', 3020.29): 0.0030202899999999997,
+    ('pmol/L', 'ng/ml', 'chemistry', 3020.29): 0.0030202899999999997,
+    ('mol/l', 'ng/ml', 'chemistry', 3020.29): 3020289999.9999995,
+    ('g/l', 'ng/ml', 'chemistry', 3020.29): 999999.9999999999,
+    ('g/L', 'ng/ml', 'chemistry', 3020.29): 999999.9999999999,
+    ('g/dl', 'ng/ml', 'chemistry', 3020.29): 9999999.999999998,
+    ('g/dL', 'ng/ml', 'chemistry', 3020.29): 9999999.999999998,
+    ('mg/l', 'ng/ml', 'chemistry', 3020.29): 999.9999999999999,
+    ('mg/L', 'ng/ml', 'chemistry', 3020.29): 999.9999999999999,
+    ('mg/dl', 'ng/ml', 'chemistry', 3020.29): 9999.999999999998,
+    ('mg/dL', 'ng/ml', 'chemistry', 3020.29): 9999.999999999998,
+    ('mg/ml', 'ng/ml', 'chemistry', 3020.29): 999999.9999999999,
+    ('ug/l', 'ng/ml', 'chemistry', 3020.29): 0.9999999999999999,
+    ('ug/L', 'ng/ml', 'chemistry', 3020.29): 0.9999999999999999,
+    ('ug/dl', 'ng/ml', 'chemistry', 3020.29): 9.999999999999998,
+    ('ug/dL', 'ng/ml', 'chemistry', 3020.29): 9.999999999999998,
+    ('ug/ml', 'ng/ml', 'chemistry', 3020.29): 999.9999999999999,
+    ('ug/mL', 'ng/ml', 'chemistry', 3020.29): 999.9999999999999,
+    ('ng/l', 'ng/ml', 'chemistry', 3020.29): 0.001,
+    ('ng/L', 'ng/ml', 'chemistry', 3020.29): 0.001,
+    ('ng/dl', 'ng/ml', 'chemistry', 3020.29): 0.01,
+    ('ng/dL', 'ng/ml', 'chemistry', 3020.29): 0.01,
+    ('ng/ml', 'ng/ml', 'chemistry', 3020.29): 1.0,
+    ('ng/mL', 'ng/ml', 'chemistry', 3020.29): 1.0,
+    ('pg/ml', 'ng/ml', 'chemistry', 3020.29): 0.0009999999999999998,
+    ('pg/mL', 'ng/ml', 'chemistry', 3020.29): 0.0009999999999999998,
+    # Ca
+    ('mmol/l', 'mg/dl', 'chemistry', 40.08): 4.008,
+    ('mmol/L', 'mg/dl', 'chemistry', 40.08): 4.008,
+    ('umol/l', 'mg/dl', 'chemistry', 40.08): 0.004007999999999999,
+    ('umol/L', 'mg/dl', 'chemistry', 40.08): 0.004007999999999999,
+    ('nmol/l', 'mg/dl', 'chemistry', 40.08): 4.008e-06,
+    ('nmol/L', 'mg/dl', 'chemistry', 40.08): 4.008e-06,
+    ('pmol/l', 'mg/dl', 'chemistry', 40.08): 4.008e-09,
+    ('pmol/L', 'mg/dl', 'chemistry', 40.08): 4.008e-09,
+    ('mol/l', 'mg/dl', 'chemistry', 40.08): 4008.0,
+    ('g/l', 'mg/dl', 'chemistry', 40.08): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 40.08): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 40.08): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 40.08): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 40.08): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 40.08): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 40.08): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 40.08): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 40.08): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 40.08): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 40.08): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 40.08): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 40.08): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 40.08): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 40.08): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 40.08): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 40.08): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 40.08): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 40.08): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 40.08): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 40.08): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 40.08): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 40.08): 1.0000000000000001e-07,
+    # Cr
+    ('mmol/l', 'mg/dl', 'chemistry', 113.126): 11.312600000000002,
+    ('mmol/L', 'mg/dl', 'chemistry', 113.126): 11.312600000000002,
+    ('umol/l', 'mg/dl', 'chemistry', 113.126): 0.011312599999999999,
+    ('umol/L', 'mg/dl', 'chemistry', 113.126): 0.011312599999999999,
+    ('nmol/l', 'mg/dl', 'chemistry', 113.126): 1.1312600000000002e-05,
+    ('nmol/L', 'mg/dl', 'chemistry', 113.126): 1.1312600000000002e-05,
+    ('pmol/l', 'mg/dl', 'chemistry', 113.126): 1.1312600000000002e-08,
+    ('pmol/L', 'mg/dl', 'chemistry', 113.126): 1.1312600000000002e-08,
+    ('mol/l', 'mg/dl', 'chemistry', 113.126): 11312.6,
+    ('g/l', 'mg/dl', 'chemistry', 113.126): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 113.126): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 113.126): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 113.126): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 113.126): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 113.126): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 113.126): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 113.126): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 113.126): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 113.126): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 113.126): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 113.126): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 113.126): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 113.126): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 113.126): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 113.126): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 113.126): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 113.126): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 113.126): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 113.126): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 113.126): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 113.126): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 113.126): 1.0000000000000001e-07,
+    # glucose
+    ('mmol/l', 'mg/dl', 'chemistry', 180.16): 18.016000000000002,
+    ('mmol/L', 'mg/dl', 'chemistry', 180.16): 18.016000000000002,
+    ('umol/l', 'mg/dl', 'chemistry', 180.16): 0.018015999999999997,
+    ('umol/L', 'mg/dl', 'chemistry', 180.16): 0.018015999999999997,
+    ('nmol/l', 'mg/dl', 'chemistry', 180.16): 1.8016000000000005e-05,
+    ('nmol/L', 'mg/dl', 'chemistry', 180.16): 1.8016000000000005e-05,
+    ('pmol/l', 'mg/dl', 'chemistry', 180.16): 1.8016e-08,
+    ('pmol/L', 'mg/dl', 'chemistry', 180.16): 1.8016e-08,
+    ('mol/l', 'mg/dl', 'chemistry', 180.16): 18016.0,
+    ('g/l', 'mg/dl', 'chemistry', 180.16): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 180.16): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 180.16): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 180.16): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 180.16): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 180.16): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 180.16): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 180.16): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 180.16): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 180.16): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 180.16): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 180.16): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 180.16): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 180.16): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 180.16): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 180.16): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 180.16): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 180.16): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 180.16): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 180.16): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 180.16): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 180.16): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 180.16): 1.0000000000000001e-07,
+    # K, Na
+    ('mmol/l', 'mmol/l', None, None): 1.0,
+    ('mmol/L', 'mmol/l', None, None): 1.0,
+    ('umol/l', 'mmol/l', None, None): 0.001,
+    ('umol/L', 'mmol/l', None, None): 0.001,
+    ('nmol/l', 'mmol/l', None, None): 1.0000000000000002e-06,
+    ('nmol/L', 'mmol/l', None, None): 1.0000000000000002e-06,
+    ('pmol/l', 'mmol/l', None, None): 1e-09,
+    ('pmol/L', 'mmol/l', None, None): 1e-09,
+    ('mol/l', 'mmol/l', None, None): 1000.0,
+    # Mg
+    ('mmol/l', 'mg/dl', 'chemistry', 24.31): 2.431,
+    ('mmol/L', 'mg/dl', 'chemistry', 24.31): 2.431,
+    ('umol/l', 'mg/dl', 'chemistry', 24.31): 0.0024309999999999996,
+    ('umol/L', 'mg/dl', 'chemistry', 24.31): 0.0024309999999999996,
+    ('nmol/l', 'mg/dl', 'chemistry', 24.31): 2.4310000000000005e-06,
+    ('nmol/L', 'mg/dl', 'chemistry', 24.31): 2.4310000000000005e-06,
+    ('pmol/l', 'mg/dl', 'chemistry', 24.31): 2.431e-09,
+    ('pmol/L', 'mg/dl', 'chemistry', 24.31): 2.431e-09,
+    ('mol/l', 'mg/dl', 'chemistry', 24.31): 2431.0,
+    ('g/l', 'mg/dl', 'chemistry', 24.31): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 24.31): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 24.31): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 24.31): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 24.31): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 24.31): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 24.31): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 24.31): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 24.31): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 24.31): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 24.31): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 24.31): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 24.31): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 24.31): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 24.31): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 24.31): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 24.31): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 24.31): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 24.31): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 24.31): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 24.31): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 24.31): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 24.31): 1.0000000000000001e-07,
+    # P
+    ('mmol/l', 'mg/dl', 'chemistry', 30.97): 3.097,
+    ('mmol/L', 'mg/dl', 'chemistry', 30.97): 3.097,
+    ('umol/l', 'mg/dl', 'chemistry', 30.97): 0.0030969999999999995,
+    ('umol/L', 'mg/dl', 'chemistry', 30.97): 0.0030969999999999995,
+    ('nmol/l', 'mg/dl', 'chemistry', 30.97): 3.0970000000000006e-06,
+    ('nmol/L', 'mg/dl', 'chemistry', 30.97): 3.0970000000000006e-06,
+    ('pmol/l', 'mg/dl', 'chemistry', 30.97): 3.097e-09,
+    ('pmol/L', 'mg/dl', 'chemistry', 30.97): 3.097e-09,
+    ('mol/l', 'mg/dl', 'chemistry', 30.97): 3097.0,
+    ('g/l', 'mg/dl', 'chemistry', 30.97): 100.0,
+    ('g/L', 'mg/dl', 'chemistry', 30.97): 100.0,
+    ('g/dl', 'mg/dl', 'chemistry', 30.97): 1000.0,
+    ('g/dL', 'mg/dl', 'chemistry', 30.97): 1000.0,
+    ('mg/l', 'mg/dl', 'chemistry', 30.97): 0.1,
+    ('mg/L', 'mg/dl', 'chemistry', 30.97): 0.1,
+    ('mg/dl', 'mg/dl', 'chemistry', 30.97): 1.0,
+    ('mg/dL', 'mg/dl', 'chemistry', 30.97): 1.0,
+    ('mg/ml', 'mg/dl', 'chemistry', 30.97): 100.0,
+    ('ug/l', 'mg/dl', 'chemistry', 30.97): 9.999999999999999e-05,
+    ('ug/L', 'mg/dl', 'chemistry', 30.97): 9.999999999999999e-05,
+    ('ug/dl', 'mg/dl', 'chemistry', 30.97): 0.001,
+    ('ug/dL', 'mg/dl', 'chemistry', 30.97): 0.001,
+    ('ug/ml', 'mg/dl', 'chemistry', 30.97): 0.09999999999999999,
+    ('ug/mL', 'mg/dl', 'chemistry', 30.97): 0.09999999999999999,
+    ('ng/l', 'mg/dl', 'chemistry', 30.97): 1.0000000000000002e-07,
+    ('ng/L', 'mg/dl', 'chemistry', 30.97): 1.0000000000000002e-07,
+    ('ng/dl', 'mg/dl', 'chemistry', 30.97): 1.0000000000000002e-06,
+    ('ng/dL', 'mg/dl', 'chemistry', 30.97): 1.0000000000000002e-06,
+    ('ng/ml', 'mg/dl', 'chemistry', 30.97): 0.00010000000000000002,
+    ('ng/mL', 'mg/dl', 'chemistry', 30.97): 0.00010000000000000002,
+    ('pg/ml', 'mg/dl', 'chemistry', 30.97): 1.0000000000000001e-07,
+    ('pg/mL', 'mg/dl', 'chemistry', 30.97): 1.0000000000000001e-07,
+    # PSA
+    ('g/l', 'ng/dl', None, None): 100000000.0,
+    ('g/L', 'ng/dl', None, None): 100000000.0,
+    ('g/dl', 'ng/dl', None, None): 999999999.9999999,
+    ('g/dL', 'ng/dl', None, None): 999999999.9999999,
+    ('mg/l', 'ng/dl', None, None): 100000.0,
+    ('mg/L', 'ng/dl', None, None): 100000.0,
+    ('mg/dl', 'ng/dl', None, None): 999999.9999999999,
+    ('mg/dL', 'ng/dl', None, None): 999999.9999999999,
+    ('mg/ml', 'ng/dl', None, None): 100000000.0,
+    ('ug/l', 'ng/dl', None, None): 99.99999999999999,
+    ('ug/L', 'ng/dl', None, None): 99.99999999999999,
+    ('ug/dl', 'ng/dl', None, None): 999.9999999999999,
+    ('ug/dL', 'ng/dl', None, None): 999.9999999999999,
+    ('ug/ml', 'ng/dl', None, None): 99999.99999999999,
+    ('ug/mL', 'ng/dl', None, None): 99999.99999999999,
+    ('ng/l', 'ng/dl', None, None): 0.1,
+    ('ng/L', 'ng/dl', None, None): 0.1,
+    ('ng/dl', 'ng/dl', None, None): 1.0,
+    ('ng/dL', 'ng/dl', None, None): 1.0,
+    ('ng/ml', 'ng/dl', None, None): 100.0,
+    ('ng/mL', 'ng/dl', None, None): 100.0,
+    ('pg/ml', 'ng/dl', None, None): 0.09999999999999999,
+    ('pg/mL', 'ng/dl', None, None): 0.09999999999999999,
+}
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Unit conversion service shared by all analyzer modules.
+#
+# Building a pint UnitRegistry is expensive (hundreds of ms), so only one
+# registry is built per process, lazily, on first use. Conversion factors are
+# memoized by (source unit, target unit, context, molecular weight); after the
+# first lookup, converting a unit that has been seen before is a dict lookup.
+#
+# The cache is seeded from modules/unit_table.py, a table precompiled from
+# pint by lisunittable.py; pint is only imported for units missing from it.
+
+from modules.unit_table import FACTORS
+
+# Variables local to module
+__registry = None
+__factors = dict(FACTORS)
+__hits = 0
+__misses = 0
+
+def get_registry():
+    """
+    Returns the process-wide pint UnitRegistry, building it on first call.
+
+    :returns: pint.UnitRegistry
+    """
+    global __registry
+    if __registry is None:
+        import pint
+        __registry = pint.UnitRegistry()
+        # Enzyme activity as used by the AST and ALT modules
+        __registry.define('kat = 1 mol / s')
+        __registry.define('U = 1.657e-8 kat')
+    return __registry
+
+def get_factor(unit, target, context=None, mw=None):
+    """
+    Returns the factor that converts values expressed in unit into target.
+
+    :param unit: (str) unit as found in LIS data (e.g. "mmol/l")
+    :param target: (str) unit used internally by the analyzer (e.g. "mg/dl")
+    :param context: (str) pint context to enable, e.g. 'chemistry' (optional)
+    :param mw: (float) molecular weight in g/mol, used by the context (optional)
+
+    :returns: float
+    """
+    global __hits
+    global __misses
+
+    key = (unit, target, context, mw)
+    if key in __factors:
+        __hits += 1
+        return __factors[key]
+    __misses += 1
+
+    ureg = get_registry()
+    if context is None:
+        factor = (ureg.parse_expression(unit)).to(target).magnitude
+    elif mw is None:
+        factor = (ureg.parse_expression(unit)).to(target, context).magnitude
+    else:
+        factor = (ureg.parse_expression(unit)).to(target, context, mw=mw*ureg('g/mol')).magnitude
+    __factors[key] = factor
+    return factor
+
+def convert(value, unit, target, context=None, mw=None):
+    """
+    Converts value from unit into target; see get_factor().
+
+    :returns: float
+    """
+    return value * get_factor(unit, target, context, mw)
+
+def cache_info():
+    """
+    Returns statistics of the conversion factor cache. Misses are lookups
+    that required pint.
+
+    :returns: dict {"hits": int, "misses": int, "size": int}
+    """
+    return {"hits": __hits, "misses": __misses, "size": len(__factors)}
+
+def cache_clear():
+    """
+    Resets the conversion factor cache to the precompiled table and resets
+    its counters. The unit registry itself is kept.
+    """
+    global __hits
+    global __misses
+    __factors.clear()
+    __factors.update(FACTORS)
+    __hits = 0
+    __misses = 0
@@ -6,7 +6,7 @@ setup(
     console=['lisanalyze.py'],
     options={
         "py2exe": {
-            "includes": ["pint","jsonschema"],
+            "includes": ["pint","jsonschema","numpy"],
             "packages": ["modules"]
         }
     }
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Shared fixtures of the tests: switches as parsed by lisanalyze.py, sample
+# patients, and the reference (serial, one JSON file per patient) analysis
+# the other input formats and modes are compared with.
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import lisanalyze
+import modules.events
+import modules.loader
+import modules.pipeline
+import modules.registry
+
+# (item name as found in LIS data, unit, low, high, ref_low, ref_high)
+__items = [
+    ("K", "mmol/L", 2.5, 7.0, "3.5", "5.0"),
+    ("Potassium", "mEq/L", 2.5, 7.0, None, None),
+    ("NA", "mmol/l", 120, 165, "135", "145"),
+    ("glucose", "mg/dl", 50, 500, None, None),
+    ("Ca", "mg/dl", 6.0, 14.0, None, None),
+    ("albumin", "g/dl", 2.0, 5.0, None, None),
+    ("AST", "U/L", 10, 2000, None, "40"),
+    ("ALT", "U/L", 10, 800, None, None),
+    ("BUN", "mg/dl", 5, 120, None, None),
+    ("Creatinine", "mg/dl", 0.5, 8.0, None, None),
+    ("PSA", "ng/dl", 0.0, 6.0, None, None),
+]
+
+def args(*argv):
+    """
+    Returns switches as lisanalyze.py would parse them from argv (quiet).
+    """
+    return lisanalyze.parser.parse_args(["-q"] + list(argv))
+
+def patients(count=6, timepoints=40, seed=1):
+    """
+    Returns sample data of patients, as decoded from data files: {patient ID
+    -> {time -> {item -> entry}}}, with item names not normalized.
+    """
+    rng = random.Random(seed)
+    data = {}
+    for p in range(count):
+        lis_struct = {}
+        for t in range(timepoints):
+            time = "2020-{:02d}-{:02d}T{:02d}:00".format(1 + t // 28, 1 + t % 28, rng.randrange(24))
+            entries = {}
+            for name, unit, low, high, ref_low, ref_high in rng.sample(__items, rng.randrange(1, 6)):
+                value = "{:.1f}".format(rng.uniform(low, high))
+                if name == "PSA" and rng.random() < 0.1:
+                    value = rng.choice(["<0.1", ">100"])
+                entry = {"lab_value": value, "unit": unit}
+                if ref_low is not None and rng.random() < 0.5:
+                    entry["ref_low"] = ref_low
+                if ref_high is not None and rng.random() < 0.5:
+                    entry["ref_high"] = ref_high
+                entries[name] = entry
+            lis_struct[time] = entries
+        data["patient{}".format(p)] = lis_struct
+    return data
+
+def records(results):
+    """
+    Returns results as written out (JSON-serializable), for comparison.
+    """
+    return modules.events.records(results)
+
+class FormatTest(unittest.TestCase):
+    """
+    Base class of tests comparing a way of reading patients with the serial
+    analysis of one JSON file per patient.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.analyzers = modules.registry.build()
+        self.patients = patients()
+        self.files = {}
+        for patient_id, lis_struct in self.patients.items():
+            file_name = os.path.join(self.dir, patient_id + ".json")
+            with open(file_name, 'w') as lis_file:
+                json.dump(lis_struct, lis_file)
+            self.files[patient_id] = file_name
+        self.serial = {}
+        switches = args("-d", self.dir)
+        for patient_id, file_name in self.files.items():
+            self.serial[patient_id] = records(modules.pipeline.analyze_file(file_name, switches, self.analyzers))
+
+    def prepared(self):
+        """
+        Returns the sample patients validated and normalized, as lisstore.py
+        and lisdb.py read them: [(patient ID, {time -> {item -> entry}})].
+        """
+        switches = args()
+        return [(patient_id, modules.loader.load(file_name, switches, self.analyzers)) for patient_id, file_name in self.files.items()]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assertMatchesSerial(self, analyzed, names=None):
+        """
+        Checks that (name, results) pairs are those of the serial analysis;
+        names maps names to patient IDs (default: names are patient IDs).
+        """
+        found = {}
+        for name, results in analyzed:
+            found[name if names is None else names[name]] = records(results)
+        self.assertEqual(sorted(found), sorted(self.serial))
+        for patient_id in self.serial:
+            self.assertEqual(found[patient_id], self.serial[patient_id], patient_id)
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Bundles (--input-format bundle) match the serial analysis of one data file
+# per patient, and patient IDs name files in --dir.
+# Run from the repository root with: python -m unittest discover tests
+
+import json
+import os
+import unittest
+
+import modules.bundle
+import modules.pipeline
+
+from tests import common
+
+class BundleTest(common.FormatTest):
+    def test_bundle(self):
+        file_name = os.path.join(self.dir, "bundle.json")
+        with open(file_name, 'w') as bundle_file:
+            json.dump(self.patients, bundle_file)
+        for jobs in (1, 2):
+            analyzed = list(modules.pipeline.run_patients(modules.bundle.patients(file_name), common.args("-d", self.dir), self.analyzers, jobs))
+            self.assertEqual([patient_id for patient_id, results in analyzed], list(self.patients))
+            self.assertMatchesSerial(analyzed)
+
+    def test_patient_file_name(self):
+        self.assertEqual(modules.pipeline.patient_file_name("123"), "123")
+        self.assertEqual(modules.pipeline.patient_file_name("../a/b"), "..%2Fa%2Fb")
+        self.assertEqual(modules.pipeline.patient_file_name("C:\\x%"), "C%3A%5Cx%25")
+        self.assertEqual(modules.pipeline.patient_file_name("a\0b"), "a%00b")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Results served from the result cache match the analysis, and files are only
+# analyzed again when they change.
+# Run from the repository root with: python -m unittest discover tests
+
+import json
+import os
+import unittest
+import unittest.mock
+
+import modules.cache
+import modules.pipeline
+
+from tests import common
+
+class CacheTest(common.FormatTest):
+    def run_cached(self, jobs=1):
+        switches = common.args("-d", self.dir)
+        cache = modules.cache.ResultCache(os.path.join(self.dir, ".lisanalyze_cache"), 64 * 1024 * 1024, modules.cache.fingerprint(switches, self.analyzers))
+        names = dict((file_name, patient_id) for patient_id, file_name in self.files.items())
+        analyzed = list(modules.pipeline.run(list(names), switches, self.analyzers, jobs, cache))
+        self.assertEqual([file_name for file_name, results in analyzed], list(names))
+        self.assertMatchesSerial(analyzed, names)
+
+    def test_cache(self):
+        self.run_cached(2)
+        # All served from the cache
+        with unittest.mock.patch.object(modules.pipeline, "analyze_file", side_effect=AssertionError("analyzed")):
+            self.run_cached()
+
+        # A changed file is analyzed again
+        patient_id, lis_struct = next(iter(self.patients.items()))
+        time = min(lis_struct)
+        item = min(lis_struct[time])
+        lis_struct[time][item]["lab_value"] = "1000"
+        with open(self.files[patient_id], 'w') as lis_file:
+            json.dump(lis_struct, lis_file)
+        self.serial[patient_id] = common.records(modules.pipeline.analyze_file(self.files[patient_id], common.args("-d", self.dir), self.analyzers))
+        self.run_cached()
+
+    def test_evict(self):
+        switches = common.args("-d", self.dir)
+        cache = modules.cache.ResultCache(os.path.join(self.dir, ".lisanalyze_cache"), 1, modules.cache.fingerprint(switches, self.analyzers))
+        for patient_id, file_name in self.files.items():
+            cache.put(cache.key(file_name), modules.pipeline.analyze_file(file_name, switches, self.analyzers))
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(os.listdir(os.path.join(self.dir, ".lisanalyze_cache")), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# SQLite databases (--input-format sqlite) match the serial analysis of one
+# data file per patient, and --incremental only analyzes changed patients.
+# Run from the repository root with: python -m unittest discover tests
+
+import os
+import unittest
+
+import modules.database
+import modules.pipeline
+
+from tests import common
+
+class DatabaseTest(common.FormatTest):
+    def setUp(self):
+        common.FormatTest.setUp(self)
+        self.path = os.path.join(self.dir, "data.db")
+        self.ingest(self.prepared())
+
+    def ingest(self, patients):
+        db = modules.database.connect(self.path, self.analyzers)
+        try:
+            modules.database.ingest(db, patients)
+        finally:
+            db.close()
+
+    def test_database(self):
+        for jobs in (1, 2):
+            analyzed = list(modules.pipeline.run_database(self.path, common.args("-d", self.dir), self.analyzers, jobs))
+            self.assertEqual([patient_id for patient_id, results in analyzed], sorted(self.patients))
+            self.assertMatchesSerial(analyzed)
+
+    def test_incremental(self):
+        switches = common.args("-d", self.dir, "-i")
+        self.assertMatchesSerial(modules.pipeline.run_database(self.path, switches, self.analyzers))
+        self.assertEqual(list(modules.pipeline.run_database(self.path, switches, self.analyzers)), [])
+
+        # Ingesting unchanged data changes nothing; a changed result marks
+        # its patient only
+        patients = self.prepared()
+        self.ingest(patients)
+        self.assertEqual(list(modules.pipeline.run_database(self.path, switches, self.analyzers)), [])
+        patient_id, lis_struct = patients[2]
+        time = min(lis_struct)
+        item = min(lis_struct[time])
+        lis_struct[time][item]["lab_value"] = "1000"
+        self.ingest([(patient_id, lis_struct)])
+        self.assertEqual([name for name, results in modules.pipeline.run_database(self.path, switches, self.analyzers)], [patient_id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Delta output (--delta): event IDs are stable, and each run reports the
+# events that are new or resolved since the previous one.
+# Run from the repository root with: python -m unittest discover tests
+
+import unittest
+
+import modules.delta
+import modules.events
+import modules.pipeline
+
+from tests import common
+
+class DeltaTest(common.FormatTest):
+    def changes(self, results, switches):
+        delta = modules.delta.diff("patient0", results, switches)
+        return sorted((event_time, change.status, change.id) for event_time, changes in delta.items() for change in changes)
+
+    def test_event_id(self):
+        event = modules.events.Event("K.high", "K", "abnormal", "Hyperkalemia", 6.5, 5.0, "mmol/l")
+        same = modules.events.Event("K.high", "K", "abnormal", "Hyperkalemia", 7.0, 5.0, "mmol/l")
+        id = modules.delta.event_id("1", "2016-01-01T08:00", event)
+        self.assertEqual(modules.delta.event_id("1", "2016-01-01T08:00", same), id)
+        self.assertEqual(modules.delta.event_id("1", "2016-01-01T08:00", modules.events.Episode("2016-01-01T08:00", same, "2016-01-02T08:00", 2)), id)
+        self.assertNotEqual(modules.delta.event_id("2", "2016-01-01T08:00", event), id)
+        self.assertNotEqual(modules.delta.event_id("1", "2016-01-01T09:00", event), id)
+
+    def test_diff(self):
+        switches = common.args("-d", self.dir, "--delta")
+        results = modules.pipeline.analyze_file(self.files["patient0"], switches, self.analyzers)
+        ids = sorted((event_time, modules.events.NEW, modules.delta.event_id("patient0", event_time, event)) for event_time, events in results.items() for event in events)
+        self.assertTrue(ids)
+        self.assertEqual(self.changes(results, switches), ids)
+        self.assertEqual(self.changes(results, switches), [])
+
+        # The events of the last timepoint are gone in the next run
+        last = max(results)
+        resolved = [(event_time, modules.events.RESOLVED, id) for event_time, status, id in ids if event_time == last]
+        del results[last]
+        self.assertEqual(self.changes(results, switches), resolved)
+        self.assertEqual(self.changes(results, switches), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Regression checks of episode compaction (--episodes).
+# Run from the repository root with: python -m unittest discover tests
+
+import argparse
+import unittest
+
+import modules.events
+import modules.pipeline
+import modules.registry
+import modules.series
+
+def args(**kwargs):
+    switches = dict(compat=False, convert=False, episodes=True, no_correct=False, quiet=True, warn=False)
+    switches.update(kwargs)
+    return argparse.Namespace(**switches)
+
+class EpisodeTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzers = modules.registry.build()
+
+    def test_mixed_reference_limits(self):
+        # High K on three consecutive timepoints, only the second of which has
+        # a provided reference limit: still one episode
+        lis_struct = {
+            "2020-01-01T08:00": {"K": {"lab_value": "5.5", "unit": "mmol/L"}},
+            "2020-01-02T08:00": {"K": {"lab_value": "5.6", "unit": "mmol/L", "ref_high": "5.0"}},
+            "2020-01-03T08:00": {"K": {"lab_value": "5.7", "unit": "mmol/L"}},
+        }
+        timeline = modules.series.build_timeline(lis_struct)
+        results = modules.pipeline.analyze_timeline("K", timeline, args(), self.analyzers)
+        episodes = [event for events in results.values() for event in events]
+        self.assertEqual(len(episodes), 1)
+        self.assertIsInstance(episodes[0], modules.events.Episode)
+        self.assertEqual((episodes[0].start, episodes[0].end, episodes[0].count), ("2020-01-01T08:00", "2020-01-03T08:00", 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Incremental analysis (--incremental) resumed from checkpoints matches a full
+# analysis, and falls back to one when earlier timepoints have changed.
+# Run from the repository root with: python -m unittest discover tests
+
+import json
+import unittest
+
+import modules.pipeline
+
+from tests import common
+
+class IncrementalTest(common.FormatTest):
+    def write(self, patient_id, lis_struct):
+        with open(self.files[patient_id], 'w') as lis_file:
+            json.dump(lis_struct, lis_file)
+
+    def analyze(self, *argv):
+        switches = common.args("-d", self.dir, "-i", *argv)
+        return [(patient_id, modules.pipeline.analyze_file(file_name, switches, self.analyzers)) for patient_id, file_name in self.files.items()]
+
+    def check(self, *argv):
+        # Earlier timepoints first, then the rest added to the files
+        for patient_id, lis_struct in self.patients.items():
+            times = sorted(lis_struct)[:len(lis_struct) // 2]
+            self.write(patient_id, dict((time, lis_struct[time]) for time in times))
+        self.analyze(*argv)
+        for patient_id, lis_struct in self.patients.items():
+            self.write(patient_id, lis_struct)
+        self.assertMatchesSerial(self.analyze(*argv))
+        # Nothing added
+        self.assertMatchesSerial(self.analyze(*argv))
+
+        # An earlier value amended: the file is analyzed again in full
+        patient_id, lis_struct = next(iter(self.patients.items()))
+        time = min(lis_struct)
+        item = min(lis_struct[time])
+        lis_struct[time][item]["lab_value"] = "1000"
+        self.write(patient_id, lis_struct)
+        self.serial[patient_id] = common.records(modules.pipeline.analyze_file(self.files[patient_id], common.args("-d", self.dir), self.analyzers))
+        self.assertMatchesSerial(self.analyze(*argv))
+
+    def test_incremental(self):
+        self.check()
+
+    def test_stream(self):
+        self.check("--stream")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,21 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Parallel analysis (--jobs) matches the serial analysis.
+# Run from the repository root with: python -m unittest discover tests
+
+import unittest
+
+import modules.pipeline
+
+from tests import common
+
+class JobsTest(common.FormatTest):
+    def test_jobs(self):
+        names = dict((file_name, patient_id) for patient_id, file_name in self.files.items())
+        analyzed = list(modules.pipeline.run(list(names), common.args("-d", self.dir), self.analyzers, 2))
+        self.assertEqual([file_name for file_name, results in analyzed], list(names))
+        self.assertMatchesSerial(analyzed, names)
+
+if __name__ == '__main__':
+    unittest.main()
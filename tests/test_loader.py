@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Checks of the validator (--validate-only).
+# Run from the repository root with: python -m unittest discover tests
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import modules.loader
+
+def args(**kwargs):
+    switches = dict(compat=False, full_validation=False)
+    switches.update(kwargs)
+    return argparse.Namespace(**switches)
+
+class CheckTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def check(self, lis_struct, **kwargs):
+        file_name = os.path.join(self.dir, "data.json")
+        with open(file_name, 'w') as lis_file:
+            json.dump(lis_struct, lis_file)
+        return modules.loader.check(file_name, args(**kwargs))
+
+    def test_valid(self):
+        self.assertIsNone(self.check({"2020-01-01T00:00": {"K": {"lab_value": "5.5", "unit": "mmol/l", "ref_high": "5"}}}))
+
+    def test_entry_not_dict(self):
+        self.assertIsNotNone(self.check({"2020-01-01T00:00": {"K": "5.5"}}))
+
+    def test_entry_value_not_string(self):
+        self.assertIsNotNone(self.check({"2020-01-01T00:00": {"K": {"lab_value": 5.5}}}))
+
+    def test_entry_limit_not_string(self):
+        self.assertIsNotNone(self.check({"2020-01-01T00:00": {"K": {"lab_value": "5.5", "unit": "mmol/l", "ref_high": 5}}}))
+
+    def test_time_format(self):
+        self.assertIsNotNone(self.check({"2020/01/01": {"K": {"lab_value": "5.5", "unit": "mmol/l"}}}))
+        self.assertIsNone(self.check({"2020/01/01": {"K": {"lab_value": "5.5", "unit": "mmol/l"}}}, compat=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Long-format NDJSON exports (--input-format ndjson) match the serial analysis
+# of one data file per patient.
+# Run from the repository root with: python -m unittest discover tests
+
+import json
+import os
+import random
+import unittest
+
+import modules.ndjson
+import modules.pipeline
+
+from tests import common
+
+class NdjsonTest(common.FormatTest):
+    def write(self, shuffle):
+        rows = []
+        for patient_id, lis_struct in self.patients.items():
+            for time, entries in lis_struct.items():
+                for item, entry in entries.items():
+                    row = {"patient_id": patient_id, "date": time, "lab_item": item}
+                    row.update(entry)
+                    rows.append(row)
+        if shuffle:
+            random.Random(2).shuffle(rows)
+        file_name = os.path.join(self.dir, "export.ndjson")
+        with open(file_name, 'w') as ndjson_file:
+            for row in rows:
+                ndjson_file.write(json.dumps(row) + "\n")
+        return file_name
+
+    def test_unsorted(self):
+        file_name = self.write(True)
+        for jobs in (1, 2):
+            self.assertMatchesSerial(modules.pipeline.run_patients(modules.ndjson.patients(file_name), common.args("-d", self.dir), self.analyzers, jobs))
+
+    def test_sorted(self):
+        file_name = self.write(False)
+        self.assertMatchesSerial(modules.pipeline.run_patients(modules.ndjson.patients(file_name, True), common.args("-d", self.dir), self.analyzers))
+
+    def test_not_sorted(self):
+        file_name = self.write(True)
+        with self.assertRaises(Exception):
+            list(modules.ndjson.patients(file_name, True))
+
+if __name__ == '__main__':
+    unittest.main()
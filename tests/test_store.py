@@ -0,0 +1,26 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Columnar stores (--input-format store) match the serial analysis of one
+# data file per patient.
+# Run from the repository root with: python -m unittest discover tests
+
+import os
+import unittest
+
+import modules.pipeline
+import modules.store
+
+from tests import common
+
+class StoreTest(common.FormatTest):
+    def test_store(self):
+        path = os.path.join(self.dir, "data.store")
+        modules.store.write(path, self.prepared(), self.analyzers)
+        for jobs in (1, 2):
+            analyzed = list(modules.pipeline.run_store(path, common.args("-d", self.dir), self.analyzers, jobs))
+            self.assertEqual([patient_id for patient_id, results in analyzed], list(self.patients))
+            self.assertMatchesSerial(analyzed)
+
+if __name__ == '__main__':
+    unittest.main()
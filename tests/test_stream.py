@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+#-*- coding: utf-8 -*-
+
+# Streamed reading (--stream) matches loading data files whole.
+# Run from the repository root with: python -m unittest discover tests
+
+import io
+import json
+import unittest
+import unittest.mock
+
+import modules.pipeline
+import modules.stream
+
+from tests import common
+
+class StreamTest(common.FormatTest):
+    def test_stream(self):
+        switches = common.args("-d", self.dir, "--stream")
+        # Several batches of timepoints per file
+        with unittest.mock.patch.object(modules.pipeline, "__batch_size", 7):
+            analyzed = [(patient_id, modules.pipeline.analyze_file(file_name, switches, self.analyzers)) for patient_id, file_name in self.files.items()]
+        self.assertMatchesSerial(analyzed)
+
+    def test_items(self):
+        # Chunks small enough to split strings, escapes and numbers
+        text = json.dumps({"a": {"b\\\"c": [1.5, -2e3, "x\\\\"]}, "d": 1.25, "e": [], "f": "\u00e9"})
+        for chunk_size in range(1, 16):
+            self.assertEqual(dict(modules.stream.items(io.StringIO(text), chunk_size)), json.loads(text), chunk_size)
+
+    def test_invalid(self):
+        for text in ('{"a": 1', '{"a": {"b": 1}', '{"a": 1} x', '[1]', '{1: 2}'):
+            with self.assertRaises(Exception, msg=text):
+                list(modules.stream.items(io.StringIO(text), 3))
+
+if __name__ == '__main__':
+    unittest.main()